@@ -1,81 +1,449 @@
 #!/usr/bin/env python
 """
 LinuxDo 帖子内容抓取脚本
-使用 Playwright 绕过 Cloudflare 保护，提取 Discourse 帖子正文
+优先走 Discourse JSON API（/t/<id>.json），被 Cloudflare 拦截（403/503）时
+回退到 Playwright 渲染页面，提取 Discourse 帖子正文
 
 Usage:
     python fetch_linuxdo.py <url> [--max-posts 5] [--format text|json]
     python fetch_linuxdo.py https://linux.do/t/topic/1463543
     python fetch_linuxdo.py https://linux.do/t/topic/1463543 --max-posts 3 --format json
+    python fetch_linuxdo.py --urls-file urls.txt [--max-posts 5]
+    python fetch_linuxdo.py --serve [--socket /tmp/fetch_linuxdo.sock] [--pool-size 4]
+
+批量模式 (--urls-file):
+    文件每行一个 URL（"-" 表示从 stdin 读取），每个 URL 输出一行 JSON。
+    需要浏览器的 URL 共用同一个 Chromium，每个 URL 使用独立的 BrowserContext。
+
+Serve 模式:
+    常驻进程预启动 N 个 Chromium，通过 Unix Domain Socket 接收 JSON 行请求
+    {"url": "...", "max_posts": 5}，逐行返回与 --format json 相同结构的结果。
+    每个请求使用独立的 BrowserContext（隔离 Cookie），浏览器累计创建
+    BROWSER_POOL_RECYCLE_AFTER 个 context 后自动重启，避免内存漂移。
 """
-import sys, io, json, argparse, re, time
+import sys, io, os, json, argparse, re, time, threading, queue, socketserver, html
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+try:
+    from selectolax.parser import HTMLParser  # 可选：C 实现的 HTML 解析器，比正则更准确
+except ImportError:
+    HTMLParser = None
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+# /t/<id>、/t/topic/<id>、/t/<slug>/<id>[/<post_number>]
+_TOPIC_RE = re.compile(r'/t/(?:(\d+)|[^/]+/(\d+))')
 
 
 def extract_topic_id(url: str) -> str:
     """从 URL 提取 topic ID"""
-    m = re.search(r'/t/(?:topic/)?(\d+)', url)
-    return m.group(1) if m else None
+    m = _TOPIC_RE.search(url)
+    return (m.group(1) or m.group(2)) if m else None
 
 
-def fetch_with_playwright(url: str, max_posts: int = 5) -> dict:
-    """用 Playwright 抓取 LinuxDo 帖子"""
-    from playwright.sync_api import sync_playwright
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+DEFAULT_SOCKET_PATH = os.environ.get("FETCH_LINUXDO_SOCKET", "/tmp/fetch_linuxdo.sock")
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "4"))
+BROWSER_POOL_RECYCLE_AFTER = int(os.environ.get("BROWSER_POOL_RECYCLE_AFTER", "100"))
+BROWSER_POOL_START_TIMEOUT = float(os.environ.get("BROWSER_POOL_START_TIMEOUT", "60"))
+# 单个请求（含排队）最长等待时间，超时即放弃，不让调用方无限阻塞
+BROWSER_POOL_FETCH_TIMEOUT = float(os.environ.get("BROWSER_POOL_FETCH_TIMEOUT", "120"))
+# 精简 Chromium 进程与内存占用（纯文本抓取不需要 GPU / 扩展 / 共享内存）
+_LAUNCH_ARGS = [
+    "--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu", "--disable-extensions",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# 只抽取文本，图片 / 样式 / 字体请求直接中止
+_BLOCKED_RESOURCES = "**/*.{png,jpg,jpeg,gif,webp,svg,ico,css,woff,woff2,ttf}"
+
+
+# 在浏览器内一次性遍历 .topic-post 并返回结构化结果
+_EXTRACT_JS = """(maxPosts) => {
+    const text = (el) => (el ? el.innerText : '').trim();
+    const titleEl = document.querySelector('#topic-title .fancy-title, .topic-title .fancy-title, h1');
+    const posts = Array.from(document.querySelectorAll('.topic-post')).slice(0, maxPosts).map((p, i) => {
+        const dateEl = p.querySelector('.post-date, time');
+        return {
+            index: i + 1,
+            author: text(p.querySelector('.username a, .names .username')) || 'unknown',
+            content: text(p.querySelector('.cooked')).slice(0, 3000),
+            date: dateEl ? (dateEl.getAttribute('datetime') || text(dateEl)) : '',
+        };
+    }).filter((x) => x.content);
+    return {title: text(titleEl), posts};
+}"""
+
+
+API_TIMEOUT = 15
+ROUTE_CACHE_TTL = 3600  # 同一 host 被 Cloudflare 拦截后，1 小时内直接走浏览器
+_route_cache = {}  # host -> 直接走浏览器的截止时间
+_route_lock = threading.Lock()
+
+_BLOCK_TAG_RE = re.compile(r'<(?:br\s*/?|/(?:p|div|li|h[1-6]|pre|blockquote|tr))>', re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+class CloudflareBlocked(Exception):
+    """API 请求被 Cloudflare 拦截，需要浏览器渲染"""
 
+
+def _html_to_text(cooked: str) -> str:
+    """把 Discourse cooked HTML 转为纯文本（优先 selectolax，未安装时用正则）"""
+    if HTMLParser is not None:
+        body = HTMLParser(cooked).body
+        return body.text(separator='\n', strip=True) if body is not None else ""
+    text = _TAG_RE.sub('', _BLOCK_TAG_RE.sub('\n', cooked))
+    return _BLANK_LINES_RE.sub('\n\n', html.unescape(text)).strip()
+
+
+def fetch_with_api(url: str, max_posts: int = 5) -> dict:
+    """通过 Discourse JSON API 抓取帖子，无需启动浏览器"""
     result = {"success": False, "url": url, "title": "", "posts": [], "error": None}
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        ctx = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-            locale="zh-CN",
-        )
-        page = ctx.new_page()
+    topic_id = extract_topic_id(url)
+    if not topic_id:
+        result["error"] = "Cannot extract topic id from URL"
+        return result
+
+    parts = urlsplit(url)
+    req = Request(
+        f"{parts.scheme or 'https'}://{parts.netloc}/t/{topic_id}.json",
+        headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+    )
+    try:
+        with urlopen(req, timeout=API_TIMEOUT) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+    except HTTPError as e:
+        if e.code in (403, 503):
+            raise CloudflareBlocked(f"HTTP {e.code}")
+        result["error"] = f"HTTP {e.code}"
+        return result
+    except ValueError:
+        # 200 但返回的是 Cloudflare 质询页而不是 JSON
+        raise CloudflareBlocked("non-JSON response")
+
+    result["title"] = data.get("title", "")
+    posts = data.get("post_stream", {}).get("posts", [])
+    for i, post in enumerate(posts[:max_posts]):
+        content = _html_to_text(post.get("cooked") or "")
+        if content:
+            result["posts"].append({
+                "index": i + 1,
+                "author": post.get("username") or "unknown",
+                "content": content[:3000],
+                "date": post.get("created_at") or "",
+            })
 
+    result["success"] = len(result["posts"]) > 0
+    return result
+
+
+def fetch_topic(url: str, max_posts: int = 5, pool=None) -> dict:
+    """先走 JSON API，被 Cloudflare 拦截时回退到 Playwright（传入 pool 则复用浏览器池）"""
+    host = urlsplit(url).netloc
+    with _route_lock:
+        browser_until = _route_cache.get(host, 0)
+
+    if time.time() >= browser_until:
         try:
-            page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            # Wait for Discourse post content to render
-            page.wait_for_selector(".topic-post", timeout=15000)
-            time.sleep(1)  # Let lazy content settle
-
-            # Extract title
-            title_el = page.query_selector("#topic-title .fancy-title, .topic-title .fancy-title, h1")
-            result["title"] = title_el.inner_text().strip() if title_el else ""
-
-            # Extract posts
-            post_els = page.query_selector_all(".topic-post")
-            for i, post_el in enumerate(post_els[:max_posts]):
-                try:
-                    author_el = post_el.query_selector(".username a, .names .username")
-                    cooked_el = post_el.query_selector(".cooked")
-                    likes_el = post_el.query_selector(".like-count, .actions .like-button .d-button-label")
-                    date_el = post_el.query_selector(".post-date, time")
-
-                    author = author_el.inner_text().strip() if author_el else "unknown"
-                    content = cooked_el.inner_text().strip() if cooked_el else ""
-                    date = date_el.get_attribute("datetime") or date_el.inner_text().strip() if date_el else ""
-
-                    if content:
-                        result["posts"].append({
-                            "index": i + 1,
-                            "author": author,
-                            "content": content[:3000],
-                            "date": date,
-                        })
-                except Exception:
-                    continue
-
-            result["success"] = len(result["posts"]) > 0
-        except Exception as e:
-            result["error"] = str(e)
+            return fetch_with_api(url, max_posts)
+        except CloudflareBlocked:
+            with _route_lock:
+                _route_cache[host] = time.time() + ROUTE_CACHE_TTL
+        except Exception:
+            pass  # 网络异常等，交给浏览器再试一次
+
+    if pool is not None:
+        return pool.fetch(url, max_posts)
+    return fetch_with_playwright(url, max_posts)
+
+
+def _launch_browser(playwright):
+    """启动 Chromium；设置 PLAYWRIGHT_CDP_ENDPOINT 时改为连接已预热的浏览器"""
+    cdp = os.environ.get("PLAYWRIGHT_CDP_ENDPOINT")
+    if cdp:
+        return playwright.chromium.connect_over_cdp(cdp)
+    return playwright.chromium.launch(headless=True, args=_LAUNCH_ARGS)
+
+
+def _new_context(browser):
+    """创建隔离的 BrowserContext（等同无痕窗口，不共享 Cookie），并屏蔽静态资源"""
+    ctx = browser.new_context(user_agent=USER_AGENT, locale="zh-CN")
+    ctx.route(_BLOCKED_RESOURCES, lambda route: route.abort())
+    return ctx
+
+
+def fetch_with_playwright(url: str, max_posts: int = 5, context=None) -> dict:
+    """用 Playwright 抓取 LinuxDo 帖子
+
+    传入 context 时复用调用方（如 BrowserPool）提供的 BrowserContext，
+    否则单次启动 Chromium，抓取完毕即关闭。
+    """
+    if context is not None:
+        return _fetch_in_context(context, url, max_posts)
+
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = _launch_browser(p)
+        try:
+            return _fetch_in_context(_new_context(browser), url, max_posts)
         finally:
             browser.close()
 
+
+def _fetch_in_context(ctx, url: str, max_posts: int) -> dict:
+    """在给定 BrowserContext 中打开页面并提取帖子"""
+    page = ctx.new_page()
+    try:
+        return _extract_from_page(page, url, max_posts)
+    finally:
+        page.close()
+
+
+def _extract_from_page(page, url: str, max_posts: int) -> dict:
+    """用已有的 Page 打开帖子并提取标题与正文"""
+    result = {"success": False, "url": url, "title": "", "posts": [], "error": None}
+
+    try:
+        page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        # Wait for Discourse post content to render
+        page.wait_for_selector(".topic-post", timeout=15000)
+        time.sleep(1)  # Let lazy content settle
+
+        # Extract title + posts in one in-browser pass (one CDP round-trip instead of ~4 per post)
+        extracted = page.evaluate(_EXTRACT_JS, max_posts)
+        result["title"] = extracted["title"]
+        result["posts"] = extracted["posts"]
+
+        result["success"] = len(result["posts"]) > 0
+    except Exception as e:
+        result["error"] = str(e)
+
     return result
 
 
+class _SharedBrowser:
+    """批量模式使用：首次需要时启动一个 Chromium，之后每个 URL 新建并关闭一个 BrowserContext
+
+    提供与 BrowserPool 相同的 fetch 接口，可直接传给 fetch_topic。
+    """
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+
+    def fetch(self, url: str, max_posts: int = 5) -> dict:
+        if self._browser is None:
+            from playwright.sync_api import sync_playwright
+
+            self._playwright = sync_playwright().start()
+            self._browser = _launch_browser(self._playwright)
+        ctx = _new_context(self._browser)
+        try:
+            return _fetch_in_context(ctx, url, max_posts)
+        finally:
+            ctx.close()
+
+    def close(self) -> None:
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+
+def fetch_batch(urls, max_posts: int = 5):
+    """逐个抓取多个 URL（生成器），Chromium 最多启动一次"""
+    browser = _SharedBrowser()
+    try:
+        for url in urls:
+            if "linux.do" not in url:
+                yield {"success": False, "url": url, "error": "Not a linux.do URL"}
+                continue
+            yield fetch_topic(url, max_posts, pool=browser)
+    finally:
+        browser.close()
+
+
+class _BrowserSlot:
+    """池中的单个 Chromium 实例，由所属 worker 线程独占（sync API 不可跨线程）"""
+
+    def __init__(self, playwright, recycle_after: int):
+        self._playwright = playwright
+        self._recycle_after = recycle_after
+        self._browser = None
+        self._contexts_created = 0
+
+    def launch(self) -> None:
+        self._browser = _launch_browser(self._playwright)
+        self._contexts_created = 0
+
+    def acquire(self):
+        """分配一个新的 BrowserContext，达到回收阈值时先重启浏览器"""
+        if self._browser is None or self._contexts_created >= self._recycle_after:
+            self.close()
+            self.launch()
+        self._contexts_created += 1
+        return _new_context(self._browser)
+
+    def release(self, ctx) -> None:
+        try:
+            ctx.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+
+class BrowserPool:
+    """长驻 Chromium 浏览器池
+
+    每个 worker 线程持有一个 sync_playwright() 与一个浏览器，任务通过队列分发，
+    避免每次抓取都冷启动 Chromium。
+    """
+
+    def __init__(self, pool_size: int = BROWSER_POOL_SIZE, recycle_after: int = BROWSER_POOL_RECYCLE_AFTER):
+        self.pool_size = max(1, pool_size)
+        self.recycle_after = max(1, recycle_after)
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._workers = []
+
+    def start(self, timeout: float = BROWSER_POOL_START_TIMEOUT) -> "BrowserPool":
+        """启动全部 worker 并等待浏览器就绪；任一 worker 启动失败则关闭整个池并抛出异常"""
+        started = []
+        for i in range(self.pool_size):
+            fut = Future()
+            t = threading.Thread(target=self._worker, args=(fut,), name=f"browser-pool-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+            started.append(fut)
+        deadline = time.monotonic() + timeout
+        try:
+            for fut in started:
+                fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except BaseException as e:
+            self.close()
+            raise RuntimeError(f"Browser pool failed to start: {e!r}") from e
+        return self
+
+    def _worker(self, started: Future) -> None:
+        # 导入与启动 Playwright 也在保护范围内，失败通过 started 报告给 start()
+        try:
+            from playwright.sync_api import sync_playwright
+
+            with sync_playwright() as p:
+                slot = _BrowserSlot(p, self.recycle_after)
+                try:
+                    slot.launch()  # 预启动，首个请求无需等待冷启动
+                    started.set_result(None)
+                    while True:
+                        job = self._jobs.get()
+                        if job is None:
+                            break
+                        url, max_posts, fut = job
+                        if not fut.set_running_or_notify_cancel():
+                            continue
+                        ctx = None
+                        try:
+                            ctx = slot.acquire()
+                            fut.set_result(fetch_with_playwright(url, max_posts, context=ctx))
+                        except Exception as e:
+                            fut.set_exception(e)
+                        finally:
+                            if ctx is not None:
+                                slot.release(ctx)
+                finally:
+                    slot.close()
+        except BaseException as e:
+            if started.done():
+                raise
+            started.set_exception(e)
+
+    def submit(self, url: str, max_posts: int = 5) -> Future:
+        fut = Future()
+        self._jobs.put((url, max_posts, fut))
+        return fut
+
+    def fetch(self, url: str, max_posts: int = 5, timeout: float = BROWSER_POOL_FETCH_TIMEOUT) -> dict:
+        fut = self.submit(url, max_posts)
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeoutError:
+            fut.cancel()  # 尚在排队则直接丢弃
+            raise TimeoutError(f"Browser fetch timed out after {timeout:g}s: {url}") from None
+
+    def close(self) -> None:
+        for _ in self._workers:
+            self._jobs.put(None)
+        for t in self._workers:
+            t.join(timeout=10)
+        self._workers.clear()
+
+
+class _FetchRequestHandler(socketserver.StreamRequestHandler):
+    """逐行读取 {"url", "max_posts"} JSON 请求，逐行写回抓取结果"""
+
+    def handle(self) -> None:
+        for raw in self.rfile:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                req = json.loads(line)
+                url = req["url"]
+                if "linux.do" not in url:
+                    data = {"success": False, "url": url, "error": "Not a linux.do URL"}
+                else:
+                    data = fetch_topic(url, int(req.get("max_posts", 5)), pool=self.server.pool)
+            except Exception as e:
+                data = {"success": False, "error": str(e)}
+            self.wfile.write((json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, pool_size: int = BROWSER_POOL_SIZE) -> None:
+    """以 Unix Domain Socket 常驻服务方式运行"""
+    if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        print(json.dumps({"success": False, "error": "--serve requires Unix domain socket support"}), file=sys.stderr)
+        sys.exit(1)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    try:
+        pool = BrowserPool(pool_size=pool_size).start()
+    except RuntimeError as e:
+        print(json.dumps({"success": False, "error": str(e)}), file=sys.stderr)
+        sys.exit(1)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, _FetchRequestHandler)
+    server.daemon_threads = True
+    server.pool = pool
+    print(json.dumps({"serving": socket_path, "pool_size": pool.pool_size}), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
 def format_text(data: dict) -> str:
     """格式化为可读文本"""
     lines = []
@@ -90,17 +458,42 @@ def format_text(data: dict) -> str:
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Fetch LinuxDo post content via Playwright")
-    parser.add_argument("url", help="LinuxDo topic URL")
+    # 仅在 CLI 入口重设编码，import 本模块不产生副作用
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Fetch LinuxDo post content via the Discourse API or Playwright")
+    parser.add_argument("url", nargs="?", help="LinuxDo topic URL")
     parser.add_argument("--max-posts", type=int, default=5, help="Max posts to extract (default: 5)")
     parser.add_argument("--format", choices=["text", "json"], default="json", help="Output format")
+    parser.add_argument("--urls-file", help="Fetch every URL in this file (one per line, '-' for stdin) and print JSON lines")
+    parser.add_argument("--serve", action="store_true", help="Run as a long-lived browser pool over a Unix socket")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"Socket path for --serve (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--pool-size", type=int, default=BROWSER_POOL_SIZE, help=f"Chromium instances for --serve (default: {BROWSER_POOL_SIZE})")
     args = parser.parse_args()
 
+    if args.serve:
+        serve(args.socket, args.pool_size)
+        return
+
+    if args.urls_file:
+        stream = sys.stdin if args.urls_file == "-" else open(args.urls_file, encoding="utf-8")
+        with stream:
+            urls = [line.strip() for line in stream if line.strip()]
+        all_ok = True
+        for data in fetch_batch(urls, args.max_posts):
+            all_ok = all_ok and data["success"]
+            print(json.dumps(data, ensure_ascii=False), flush=True)
+        sys.exit(0 if all_ok else 1)
+
+    if not args.url:
+        parser.error("url is required (unless using --serve or --urls-file)")
+
     if "linux.do" not in args.url:
         print(json.dumps({"success": False, "error": "Not a linux.do URL"}, ensure_ascii=False))
         sys.exit(1)
 
-    data = fetch_with_playwright(args.url, args.max_posts)
+    data = fetch_topic(args.url, args.max_posts)
 
     if args.format == "json":
         print(json.dumps(data, ensure_ascii=False, indent=2))
@@ -24,17 +24,119 @@ Examples:
 """
 
 import argparse
+import asyncio
+import gzip
 import hashlib
+import heapq
+import importlib
 import json
 import os
+import queue
+import random
 import re
+import subprocess
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial, wraps
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Sequence, NamedTuple, Callable
 from urllib.request import Request, urlopen
 from urllib.error import HTTPError, URLError
-from urllib.parse import quote
+from urllib.parse import quote, urlencode
+
+# orjson (optional) is a much faster drop-in for cache files, API bodies and CLI output
+try:
+    import orjson
+
+    def _dumps(obj: Any, indent: bool = False) -> str:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode("utf-8")
+
+    _dumpb = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any, indent: bool = False) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+    def _dumpb(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
+# msgpack (optional) gives a compact binary cache format; JSON is used otherwise
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# hyperscan (optional) matches a whole signal category in one SIMD pass
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# pyahocorasick (optional) scans all platform keywords in one pass; regex otherwise
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class _LazyImport:
+    """
+    Optional dependency imported on first use, so runs that never touch the
+    network (cache hits, --cache-stats) don't pay for loading it.
+    Truthy only if the module is installed.
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = self
+    
+    def _load(self) -> Any:
+        if self._module is self:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError:
+                self._module = None
+        return self._module
+    
+    def __bool__(self) -> bool:
+        return self._load() is not None
+    
+    def __getattr__(self, attr: str) -> Any:
+        module = self._load()
+        if module is None:
+            raise AttributeError(f"optional module {self._name!r} is not installed")
+        return getattr(module, attr)
+
+
+# aiohttp (optional) lets independent API calls run concurrently on one event loop
+aiohttp = _LazyImport("aiohttp")
+
+# uvloop (optional) runs that event loop on libuv instead of the stock selector loop
+uvloop = _LazyImport("uvloop")
+
+# requests (optional) keeps connections alive across calls; urlopen otherwise
+requests = _LazyImport("requests")
+
+# httpx with h2 (optional) multiplexes concurrent calls to one host over a single HTTP/2 connection
+httpx = _LazyImport("httpx")
+
+# brotli (optional) lets the urlopen fallback accept br-compressed responses too
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ijson (optional) builds only the needed fields of large responses
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 
 # =============================================================================
@@ -43,17 +145,86 @@ from urllib.parse import quote
 
 CACHE_DIR = Path(os.environ.get("WSP_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")))
 DEFAULT_CACHE_TTL = 3600  # 1 hour in seconds
+DEFAULT_STALE_FACTOR = 4.0  # stale entries are served (and refreshed) until ttl * factor
+DEFAULT_HEDGE_AFTER = 0.0  # opt-in: seconds before a slow provider gets raced by the next one (0 = off)
+CACHE_FILL_WAIT = 30.0  # seconds a run waits for another process fetching the same entry
+CACHE_SUFFIX = ".msgpack" if msgpack else ".json"
+_CACHE_SUFFIXES = (".msgpack", ".json")  # all formats ever written, for clear/stats/migration
+
+# Process-local LRU in front of the disk cache: cache_key -> (timestamp, entry)
+_MEM_CACHE: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_MEM_MAX = 256
+
+# Negative lookups: keys with no disk entry, trusted while the cache
+# directory's mtime (bumped by every file added or removed) is unchanged
+_MISSING_KEYS: set = set()
+_MISSING_DIR_MTIME: Optional[int] = None
+_MISSING_MAX = 4096
+_STATS_PARALLEL_MIN = 64  # cache_stats uses a thread pool from this many entries
+
+
+def _mem_cache_put(cache_key: str, entry: Dict[str, Any]) -> None:
+    """Insert an entry into the in-memory LRU, evicting the oldest when full."""
+    _MEM_CACHE[cache_key] = (entry.get("_cache_timestamp", 0), entry)
+    _MEM_CACHE.move_to_end(cache_key)
+    if len(_MEM_CACHE) > _MEM_MAX:
+        _MEM_CACHE.popitem(last=False)
 
 
 def _get_cache_key(query: str, provider: str, max_results: int) -> str:
     """Generate a unique cache key from query parameters."""
     key_string = f"{query}|{provider}|{max_results}"
-    return hashlib.sha256(key_string.encode("utf-8")).hexdigest()[:32]
+    # Non-cryptographic use: blake2b is faster than sha256 and yields the same 32 hex chars
+    return hashlib.blake2b(key_string.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _get_cache_path(cache_key: str, provider: str) -> Path:
+    """Get the file path for a cache entry.
+
+    The provider is embedded in the file name so stats/clear can work from a
+    directory listing without opening each entry.
+    """
+    return CACHE_DIR / f"{provider}_{cache_key}{CACHE_SUFFIX}"
 
 
-def _get_cache_path(cache_key: str) -> Path:
-    """Get the file path for a cache entry."""
-    return CACHE_DIR / f"{cache_key}.json"
+def _cache_path_candidates(cache_key: str, provider: str) -> List[Path]:
+    """Current cache path first, then paths used by older cache layouts."""
+    return [
+        _get_cache_path(cache_key, provider),
+        CACHE_DIR / f"{provider}_{cache_key}.json",
+        CACHE_DIR / f"{cache_key}.json",
+    ]
+
+
+def _provider_from_filename(name: str) -> str:
+    """Extract the provider from a '{provider}_{key}.{ext}' cache file name."""
+    stem = name.rsplit(".", 1)[0]
+    return stem.split("_", 1)[0] if "_" in stem else "unknown"
+
+
+def _encode_cache_entry(entry: Dict[str, Any]) -> bytes:
+    """Serialize a cache entry (msgpack if available, compact JSON otherwise)."""
+    if msgpack is not None:
+        return msgpack.packb(entry, use_bin_type=True)
+    return _dumps(entry).encode("utf-8")
+
+
+def _decode_cache_entry(raw: bytes) -> Dict[str, Any]:
+    """Deserialize a cache entry, accepting both msgpack and legacy JSON files."""
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(raw, raw=False)
+        except Exception:
+            pass
+    return _loads(raw)
+
+
+def _scan_cache_dir():
+    """Yield os.DirEntry objects for every cache file regardless of format."""
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(_CACHE_SUFFIXES) and entry.is_file():
+                yield entry
 
 
 def _ensure_cache_dir() -> None:
@@ -61,40 +232,96 @@ def _ensure_cache_dir() -> None:
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def cache_get(query: str, provider: str, max_results: int, ttl: int = DEFAULT_CACHE_TTL) -> Optional[Dict[str, Any]]:
+def cache_get(
+    query: str,
+    provider: str,
+    max_results: int,
+    ttl: int = DEFAULT_CACHE_TTL,
+    stale_factor: float = 1.0,
+) -> Tuple[Optional[Dict[str, Any]], bool]:
     """
     Retrieve cached search results if they exist and are not expired.
     
+    Entries older than ttl but younger than ttl * stale_factor are still
+    returned, flagged as stale so the caller can refresh them.
+    
     Args:
         query: The search query
         provider: The search provider
         max_results: Maximum results requested
         ttl: Time-to-live in seconds (default: 1 hour)
+        stale_factor: Hard expiry as a multiple of ttl (default: 1.0 = no stale window)
     
     Returns:
-        Cached result dict or None if not found/expired
+        (cached result dict or None if not found/expired, is_stale)
     """
     cache_key = _get_cache_key(query, provider, max_results)
-    cache_path = _get_cache_path(cache_key)
+    hard_ttl = ttl * max(stale_factor, 1.0)
     
-    if not cache_path.exists():
-        return None
+    mem = _MEM_CACHE.get(cache_key)
+    if mem is not None:
+        age = time.time() - mem[0]
+        if age <= hard_ttl:
+            _MEM_CACHE.move_to_end(cache_key)
+            return mem[1], age > ttl
+        del _MEM_CACHE[cache_key]
     
+    # One stat of the directory answers repeated misses (and a missing cache
+    # directory) without probing every candidate path
+    global _MISSING_DIR_MTIME
     try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            cached = json.load(f)
+        dir_mtime = os.stat(CACHE_DIR).st_mtime_ns
+    except OSError:
+        return None, False
+    if dir_mtime != _MISSING_DIR_MTIME:
+        _MISSING_KEYS.clear()
+        _MISSING_DIR_MTIME = dir_mtime
+    elif cache_key in _MISSING_KEYS:
+        return None, False
+    
+    # Fall back to entries written in older cache layouts
+    cache_path = next((p for p in _cache_path_candidates(cache_key, provider) if p.exists()), None)
+    if cache_path is None:
+        if len(_MISSING_KEYS) >= _MISSING_MAX:
+            _MISSING_KEYS.clear()
+        _MISSING_KEYS.add(cache_key)
+        return None, False
+    
+    try:
+        cached = _decode_cache_entry(cache_path.read_bytes())
         
-        cached_time = cached.get("_cache_timestamp", 0)
-        if time.time() - cached_time > ttl:
+        age = time.time() - cached.get("_cache_timestamp", 0)
+        if age > hard_ttl:
             # Cache expired, remove it
             cache_path.unlink(missing_ok=True)
-            return None
+            return None, False
         
-        return cached
+        _mem_cache_put(cache_key, cached)
+        return cached, age > ttl
     except (json.JSONDecodeError, IOError, KeyError):
         # Corrupted cache file, remove it
         cache_path.unlink(missing_ok=True)
-        return None
+        return None, False
+
+
+def _spawn_cache_refresh(lock_path: Path) -> None:
+    """Re-run the current command detached with --refresh-cache to renew a stale entry.
+    
+    A thread would die with this short-lived CLI process, so the refresh runs in
+    its own process and the caller gets the stale result without waiting. The
+    caller must hold the entry's fill lock (see acquire_fill_lock()); it passes
+    to the child, which releases it when done, so at most one refresh per entry
+    runs at a time.
+    """
+    kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--refresh-cache"], **kwargs)
+    except OSError:
+        release_fill_lock(lock_path)  # Best effort: the entry is refreshed on a later miss instead
 
 
 def cache_put(query: str, provider: str, max_results: int, result: Dict[str, Any]) -> None:
@@ -110,41 +337,126 @@ def cache_put(query: str, provider: str, max_results: int, result: Dict[str, Any
     _ensure_cache_dir()
     
     cache_key = _get_cache_key(query, provider, max_results)
-    cache_path = _get_cache_path(cache_key)
+    cache_path = _get_cache_path(cache_key, provider)
     
     # Add cache metadata
-    cached_result = result.copy()
-    cached_result["_cache_timestamp"] = time.time()
-    cached_result["_cache_key"] = cache_key
-    cached_result["_cache_query"] = query
-    cached_result["_cache_provider"] = provider
-    cached_result["_cache_max_results"] = max_results
+    cached_result = {
+        **result,
+        "_cache_timestamp": time.time(),
+        "_cache_key": cache_key,
+        "_cache_query": query,
+        "_cache_provider": provider,
+        "_cache_max_results": max_results,
+    }
+    _mem_cache_put(cache_key, cached_result)
+    _MISSING_KEYS.discard(cache_key)
     
+    # Write to a temp file and swap it in so readers never see a partial entry
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
     try:
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(cached_result, f, ensure_ascii=False, indent=2)
+        tmp_path.write_bytes(_encode_cache_entry(cached_result))
+        os.replace(tmp_path, cache_path)
     except IOError as e:
+        tmp_path.unlink(missing_ok=True)
         # Non-fatal: log to stderr but don't fail
         print(json.dumps({"cache_write_error": str(e)}), file=sys.stderr)
 
 
-def cache_clear() -> Dict[str, Any]:
+def acquire_fill_lock(
+    query: str,
+    provider: str,
+    max_results: int,
+    wait: float = CACHE_FILL_WAIT,
+    block: bool = True,
+) -> Optional[Path]:
+    """
+    Coalesce concurrent cache misses for the same entry across processes.
+    
+    The first run creates a lock file next to the cache entry and fetches;
+    runs arriving while it is held wait until it is released (or `wait`
+    seconds pass) and should then re-check the cache instead of calling the
+    provider too. Locks older than `wait` are left over from a crashed run
+    and are taken over.
+    
+    Args:
+        query: The search query
+        provider: The search provider
+        max_results: Maximum results requested
+        wait: Longest time to wait for another run, in seconds
+        block: If False, return None right away when another run holds the lock
+    
+    Returns:
+        The lock path if this run should fetch (hand it to
+        release_fill_lock() afterwards), or None if another run holds it
+    """
+    try:
+        _ensure_cache_dir()
+    except OSError:
+        return None
+    lock_path = _fill_lock_path(query, provider, max_results)
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return lock_path
+        except FileExistsError:
+            pass
+        except OSError:
+            return None  # Unwritable cache: nothing to coalesce on
+        try:
+            if time.time() - lock_path.stat().st_mtime > wait:
+                lock_path.unlink(missing_ok=True)
+                continue
+        except OSError:
+            pass
+        if not block:
+            return None
+        # Someone else is fetching: wait for them rather than racing for the lock
+        while lock_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return None
+
+
+def _fill_lock_path(query: str, provider: str, max_results: int) -> Path:
+    return CACHE_DIR / f"{provider}_{_get_cache_key(query, provider, max_results)}.lock"
+
+
+def release_fill_lock(lock_path: Optional[Path]) -> None:
+    """Release a lock taken by acquire_fill_lock() (None is ignored)."""
+    if lock_path is not None:
+        try:
+            lock_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def cache_clear(provider: Optional[str] = None) -> Dict[str, Any]:
     """
     Clear all cached results.
     
+    Args:
+        provider: Only clear entries of this provider (default: all)
+    
     Returns:
         Stats about what was cleared
     """
+    _MEM_CACHE.clear()
+    _MISSING_KEYS.clear()
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.clear()
+    
     if not CACHE_DIR.exists():
         return {"cleared": 0, "message": "Cache directory does not exist"}
     
     count = 0
     size_freed = 0
     
-    for cache_file in CACHE_DIR.glob("*.json"):
+    for entry in _scan_cache_dir():
+        if provider and _provider_from_filename(entry.name) != provider:
+            continue
         try:
-            size_freed += cache_file.stat().st_size
-            cache_file.unlink()
+            size_freed += entry.stat().st_size
+            os.unlink(entry.path)
             count += 1
         except IOError:
             pass
@@ -175,39 +487,59 @@ def cache_stats() -> Dict[str, Any]:
             "exists": False
         }
     
-    entries = list(CACHE_DIR.glob("*.json"))
+    total_entries = 0
     total_size = 0
     oldest_time = None
     newest_time = None
-    oldest_query = None
-    newest_query = None
+    oldest_path = None
+    newest_path = None
     provider_counts = {}
     
-    for cache_file in entries:
+    def _stat_one(entry) -> Optional[Tuple[int, float, str, str]]:
         try:
-            stat = cache_file.stat()
-            total_size += stat.st_size
-            
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cached = json.load(f)
-            
-            ts = cached.get("_cache_timestamp", 0)
-            query = cached.get("_cache_query", "unknown")
-            provider = cached.get("_cache_provider", "unknown")
-            
-            provider_counts[provider] = provider_counts.get(provider, 0) + 1
-            
-            if oldest_time is None or ts < oldest_time:
-                oldest_time = ts
-                oldest_query = query
-            if newest_time is None or ts > newest_time:
-                newest_time = ts
-                newest_query = query
+            stat = entry.stat()
+        except IOError:
+            return None
+        return stat.st_size, stat.st_mtime, _provider_from_filename(entry.name), entry.path
+    
+    # Directory listing + stat only; the write time is the file mtime.
+    # Large caches overlap the stat syscalls on a thread pool.
+    entries = list(_scan_cache_dir())
+    if len(entries) >= _STATS_PARALLEL_MIN:
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as ex:
+            stats = list(ex.map(_stat_one, entries))
+    else:
+        stats = [_stat_one(e) for e in entries]
+    
+    for item in stats:
+        if item is None:
+            continue
+        size, ts, provider, path = item
+        total_entries += 1
+        total_size += size
+        provider_counts[provider] = provider_counts.get(provider, 0) + 1
+        
+        if oldest_time is None or ts < oldest_time:
+            oldest_time = ts
+            oldest_path = path
+        if newest_time is None or ts > newest_time:
+            newest_time = ts
+            newest_path = path
+    
+    def _query_of(path: Optional[str]) -> Optional[str]:
+        # Only the oldest/newest entries are opened to report their query
+        if path is None:
+            return None
+        try:
+            return _decode_cache_entry(Path(path).read_bytes()).get("_cache_query", "unknown")
         except (json.JSONDecodeError, IOError):
-            pass
+            return "unknown"
+    
+    oldest_query = _query_of(oldest_path)
+    newest_query = _query_of(newest_path)
     
     return {
-        "total_entries": len(entries),
+        "total_entries": total_entries,
         "total_size_bytes": total_size,
         "total_size_kb": round(total_size / 1024, 2),
         "providers": provider_counts,
@@ -229,22 +561,24 @@ def cache_stats() -> Dict[str, Any]:
 # =============================================================================
 # Auto-load .env from skill directory (if exists)
 # =============================================================================
+# One pass over the whole file: [export ]KEY=value, value optionally quoted.
+# Comment lines never match since keys must start with a letter or underscore.
+_ENV_RE = re.compile(
+    r'^[^\S\n]*(?:export[^\S\n]+)?([A-Za-z_]\w*)[^\S\n]*=[^\S\n]*'
+    r'(?:"([^"\n]*)"|\'([^\'\n]*)\'|(.*?))[^\S\n]*$',
+    re.MULTILINE,
+)
+
+
 def _load_env_file():
     """Load .env file from skill root directory if it exists."""
     env_path = Path(__file__).parent.parent / ".env"
-    if env_path.exists():
-        with open(env_path, encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    # Handle export VAR=value or VAR=value
-                    if line.startswith("export "):
-                        line = line[7:]
-                    key, _, value = line.partition("=")
-                    key = key.strip()
-                    value = value.strip().strip('"').strip("'")
-                    if key and key not in os.environ:
-                        os.environ[key] = value
+    try:
+        data = env_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return
+    for key, dq, sq, bare in _ENV_RE.findall(data):
+        os.environ.setdefault(key, dq or sq or bare)
 
 _load_env_file()
 
@@ -253,6 +587,10 @@ _load_env_file()
 # Configuration
 # =============================================================================
 
+ALL_PROVIDERS = ("serper", "tavily", "exa", "you", "searxng", "github", "reddit", "twitter", "linuxdo")
+KEYLESS_PROVIDERS = frozenset({"github", "reddit", "twitter", "linuxdo"})
+_AVAILABLE_PROVIDERS: Dict[tuple, Tuple[str, ...]] = {}  # config fingerprint -> providers
+
 DEFAULT_CONFIG = {
     "defaults": {
         "provider": "serper",
@@ -264,6 +602,8 @@ DEFAULT_CONFIG = {
         "provider_priority": ["serper", "tavily", "exa", "you", "searxng", "github", "reddit", "twitter", "linuxdo"],
         "disabled_providers": [],
         "confidence_threshold": 0.3,  # Below this, note low confidence
+        "stale_factor": DEFAULT_STALE_FACTOR,  # Serve expired cache until ttl * factor, refreshing in background
+        "hedge_after": DEFAULT_HEDGE_AFTER,  # Opt-in: start the next provider if no answer by then (0 = strictly sequential)
     },
     "serper": {
         "country": "us",
@@ -290,14 +630,35 @@ DEFAULT_CONFIG = {
 }
 
 
+CONFIG_PATH = Path(__file__).parent.parent / "config.json"
+_CONFIG_MTIME = None  # config.json mtime behind the memoized config
+
+
 def load_config() -> Dict[str, Any]:
-    """Load configuration from config.json if it exists, with defaults."""
+    """Load configuration from config.json if it exists, with defaults.
+    
+    Memoized per process on config.json's mtime: an edited file is picked up
+    by long-lived processes, and the lookups derived from the old config are
+    dropped with it (see clear_config_cache()).
+    """
+    global _CONFIG_MTIME
+    try:
+        mtime = CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime != _CONFIG_MTIME and _load_config_cached.cache_info().currsize:
+        clear_config_cache()
+    _CONFIG_MTIME = mtime
+    return _load_config_cached(mtime)
+
+
+@lru_cache(maxsize=1)
+def _load_config_cached(mtime: Optional[int]) -> Dict[str, Any]:
     config = DEFAULT_CONFIG.copy()
-    config_path = Path(__file__).parent.parent / "config.json"
     
-    if config_path.exists():
+    if mtime is not None:
         try:
-            with open(config_path, encoding='utf-8') as f:
+            with open(CONFIG_PATH, encoding='utf-8') as f:
                 user_config = json.load(f)
                 for key, value in user_config.items():
                     if isinstance(value, dict) and key in config:
@@ -313,6 +674,37 @@ def load_config() -> Dict[str, Any]:
     return config
 
 
+def clear_config_cache() -> None:
+    """Drop memoized config and API key lookups (e.g. after editing env or config.json)."""
+    _load_config_cached.cache_clear()
+    _validate_api_key_cached.cache_clear()
+    _build_parser.cache_clear()
+    _AVAILABLE_PROVIDERS.clear()
+
+
+def get_available_providers(config: Dict[str, Any]) -> Tuple[str, ...]:
+    """Providers usable for routing: keyless ones plus those with a key, minus disabled.
+    
+    Memoized on the parts of the config that can change the answer (the
+    provider sections holding keys and the disabled list); keys that come
+    from the environment are read once per fingerprint, see clear_config_cache().
+    """
+    disabled = config.get("auto_routing", {}).get("disabled_providers", [])
+    fingerprint = (
+        tuple(disabled),
+        tuple(repr(config.get(p)) for p in ALL_PROVIDERS if p not in KEYLESS_PROVIDERS),
+    )
+    available = _AVAILABLE_PROVIDERS.get(fingerprint)
+    if available is None:
+        if len(_AVAILABLE_PROVIDERS) >= 32:
+            _AVAILABLE_PROVIDERS.clear()
+        available = _AVAILABLE_PROVIDERS[fingerprint] = tuple(
+            p for p in ALL_PROVIDERS
+            if p not in disabled and (p in KEYLESS_PROVIDERS or get_api_key(p, config))
+        )
+    return available
+
+
 def get_api_key(provider: str, config: Dict[str, Any] = None) -> Optional[str]:
     """Get API key for provider from config.json or environment.
     
@@ -368,6 +760,18 @@ def get_env_key(provider: str) -> Optional[str]:
 
 def validate_api_key(provider: str, config: Dict[str, Any] = None) -> str:
     """Validate and return API key (or instance URL for SearXNG), with helpful error messages."""
+    if config is not None and config is load_config():
+        return _validate_api_key_cached(provider)
+    return _validate_api_key(provider, config)
+
+
+@lru_cache(maxsize=None)
+def _validate_api_key_cached(provider: str) -> str:
+    # Only successful validations are cached; failures exit the process
+    return _validate_api_key(provider, load_config())
+
+
+def _validate_api_key(provider: str, config: Optional[Dict[str, Any]]) -> str:
     key = get_api_key(provider, config)
     
     # Special handling for SearXNG - it needs instance URL, not API key
@@ -440,6 +844,98 @@ def validate_api_key(provider: str, config: Dict[str, Any] = None) -> str:
 # Intelligent Auto-Routing Engine
 # =============================================================================
 
+# Social platform keywords used by QueryAnalyzer._sub_route_social.
+# Literal keywords are (keyword, needs_word_boundary); everything else stays regex.
+_SOCIAL_PLATFORM_LITERALS = {
+    "github": (("github", True), ("git", True), ("star", True), ("stars", True)),
+    "reddit": (("reddit", True), ("subreddit", True), ("upvote", True), ("redditor", True)),
+    "twitter": (("twitter", True), ("tweet", True), ("𝕏", True), ("x.com", True)),
+    "linuxdo": (("l站", False), ("开发调优", False), ("资源荟萃", False),
+                ("非我莫属", False), ("扬帆起航", False), ("跳蚤市场", False)),
+}
+_SOCIAL_PLATFORM_PATTERNS = {
+    "github": [r'\btrending\s+(repos?|repositories|projects?)\b', r'\bopen.?source\b'],
+    "reddit": [r'\br/\w+'],
+    "twitter": [r'#\w{2,}', r'@\w{2,}'],
+    "linuxdo": [r'linux[\s._-]?do'],
+}
+_WORD_CHAR_RE = re.compile(r'\w')
+
+
+def _is_word_bounded(text: str, start: int, end: int) -> bool:
+    """True if text[start:end] has a regex word boundary (\\b) on both sides."""
+    return not (
+        (start > 0 and _WORD_CHAR_RE.match(text, start - 1))
+        or _WORD_CHAR_RE.match(text, end)
+    )
+
+
+def _build_social_matchers():
+    """Build the keyword automaton (if available) and one fused regex per platform."""
+    automaton = None
+    regexes = {}
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for platform, keywords in _SOCIAL_PLATFORM_LITERALS.items():
+            for keyword, bounded in keywords:
+                automaton.add_word(keyword, (platform, len(keyword), bounded))
+        automaton.make_automaton()
+    for platform, patterns in _SOCIAL_PLATFORM_PATTERNS.items():
+        if automaton is None:
+            patterns = [
+                rf'\b{re.escape(k)}\b' if bounded else re.escape(k)
+                for k, bounded in _SOCIAL_PLATFORM_LITERALS[platform]
+            ] + patterns
+        regexes[platform] = re.compile("|".join(patterns))
+    return automaton, regexes
+
+
+_SOCIAL_AUTOMATON, _SOCIAL_PLATFORM_RES = _build_social_matchers()
+
+
+@lru_cache(maxsize=1024)
+def _detect_social_platforms(query_lower: str) -> frozenset:
+    """Return the social platforms explicitly referenced by a lowercased query."""
+    found = set()
+    if _SOCIAL_AUTOMATON is not None:
+        for end, (platform, length, bounded) in _SOCIAL_AUTOMATON.iter(query_lower):
+            if platform in found:
+                continue
+            start = end - length + 1
+            if bounded and not _is_word_bounded(query_lower, start, end + 1):
+                continue
+            found.add(platform)
+    for platform, regex in _SOCIAL_PLATFORM_RES.items():
+        if platform not in found and regex.search(query_lower):
+            found.add(platform)
+    return frozenset(found)
+
+
+# CJK ideographs (incl. Extension A and compatibility block)
+_CJK_CHARS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_CJK_RE = re.compile(f'[{_CJK_CHARS}]')
+# r'\bkeyword\b' / r'\bhow much\b' style signal patterns, matchable as plain keywords
+_BOUNDED_KEYWORD_PATTERN_RE = re.compile(r'\\b(\w(?:[\w ]*\w)?)\\b')
+_WORD_TOKEN_RE = re.compile(r'\w+')
+# Signal patterns built only from CJK literals, groups, | and ? can't match without a CJK char
+_CJK_ONLY_PATTERN_RE = re.compile(f'[{_CJK_CHARS}()|?]+')
+
+# Unicode-aware classes that Hyperscan's ASCII classes could under-match
+_HS_UNSAFE_RE = re.compile(r'\\[wWdDsSB]')
+
+
+def _hs_collect(pattern_id: int, start: int, end: int, flags: int, hits: set) -> None:
+    """Hyperscan match callback: record which pattern ids matched."""
+    hits.add(pattern_id)
+
+
+class SignalMatch(NamedTuple):
+    """One matched routing signal; analyze() reports these as dicts."""
+    pattern: str
+    matched: str
+    weight: float
+
+
 class QueryAnalyzer:
     """
     Intelligent query analysis for smart provider routing.
@@ -821,15 +1317,15 @@ class QueryAnalyzer:
         r'(大家怎么看|what\s+do\s+people\s+think)': 3.0,
 
         # LinuxDo signals — use non-\b patterns for CJK mixed text
-        r'(?i)linux[\s._-]?do': 5.0,  # matches: linuxdo, linux.do, linux do, LinuxDo
-        r'(?i)LINUX\s*DO': 5.0,
+        r'linux[\s._-]?do': 5.0,  # matches: linuxdo, linux.do, linux do, LinuxDo
+        r'linux\s*do': 5.0,
         r'(?:^|[\s,，。])佬(?:友|们)?': 2.5,  # 佬/佬友/佬们 (LinuxDo slang)
         r'开发调优': 3.5,
         r'资源荟萃': 3.5,
         r'非我莫属': 3.0,
         r'扬帆起航': 3.0,
         r'跳蚤市场': 3.0,
-        r'L站': 4.0,  # LinuxDo nickname
+        r'l站': 4.0,  # LinuxDo nickname (L站)
 
         # Chinese community/forum signals (moderate)
         r'帖子?': 2.0,
@@ -839,6 +1335,31 @@ class QueryAnalyzer:
         r'吐槽': 2.0,
     }
 
+    # SOCIAL_SIGNALS patterns whose match guarantees the platform keyword check
+    # in _sub_route_social would hit too, so the social scan's provenance is reused
+    _SOCIAL_PATTERN_PLATFORM = {
+        r'\btwitter\b': "twitter",
+        r'\b𝕏\b': "twitter",
+        r'\bx\.com\b': "twitter",
+        r'#\w{2,}': "twitter",
+        r'@\w{2,}': "twitter",
+        r'\breddit\b': "reddit",
+        r'\bsubreddit\b': "reddit",
+        r'\br/\w+': "reddit",
+        r'\bgithub\s+trending\b': "github",
+        r'\btrending\s+(repos?|repositories|projects?)\b': "github",
+        r'\bgithub\s+discussions?\b': "github",
+        r'\bgithub\s+(stars?|issues?|releases?)\b': "github",
+        r'\bgithub\b(?!.*\b(similar|like|alternative))\b': "github",
+        r'linux[\s._-]?do': "linuxdo",
+        r'开发调优': "linuxdo",
+        r'资源荟萃': "linuxdo",
+        r'非我莫属': "linuxdo",
+        r'扬帆起航': "linuxdo",
+        r'跳蚤市场': "linuxdo",
+        r'l站': "linuxdo",
+    }
+
     # Brand/product patterns for shopping detection
     BRAND_PATTERNS = [
         # Tech brands
@@ -861,102 +1382,420 @@ class QueryAnalyzer:
         r'\b(keyboard|mouse|gaming)\b',
     ]
     
+    # Precompiled helper patterns (compiled once at class definition).
+    # Patterns are lowercase and run against the lowercased query, so they are
+    # compiled case-sensitively; only _URL_RE sees the original query because
+    # the detected URL is reported with its original casing.
+    # Brands and product indicators are each one alternation: a single
+    # search answers "does any of them match?"
+    _BRAND_RE = re.compile("|".join(f"(?:{p})" for p in BRAND_PATTERNS))
+    _PRODUCT_INDICATOR_RE = re.compile("|".join([
+        r'\b(?:buy|price|specs?|review|vs|compare)\b',
+        r'\b(?:pro|max|plus|mini|ultra|lite)\b',  # Product tier names
+        r'\b\d+\s*(?:gb|tb|inch|mm|hz)\b',  # Specifications
+    ]))
+    # Explicit URL (group 1) or bare domain (group 2) in a single scan
+    _URL_RE = re.compile(r'(https?://[^\s]+)|\b((?i:\w+\.(?:com|org|io|ai|co|dev|net|app)))\b')
+    _HTTP_URL_RE = re.compile(r'https?://[^\s]+')
+    # Complexity and recency are scored from one \w+ tokenization: a token
+    # equal to a keyword is exactly a \b-delimited match of that keyword
+    _QUESTION_WORDS = frozenset({"what", "why", "how", "when", "where", "which", "who", "whose", "whom"})
+    _CLAUSE_WORDS = frozenset({"and", "but", "or", "because", "since", "while", "although", "if", "when"})
+    # Each recency group adds its weight once: (single words, phrase group, weight)
+    _RECENCY_GROUPS = (
+        (frozenset({"latest", "newest", "recent", "current"}), None, 2.5),
+        (frozenset({"today", "yesterday"}), 1, 3.0),  # + "this week" / "this month"
+        (frozenset({"2024", "2025", "2026", "2027", "2028", "2029", "2030"}), None, 2.0),
+        (frozenset({"breaking", "live", "just", "now"}), None, 3.0),
+        (frozenset(), 2, 2.5),  # "last hour/day/week/month"
+    )
+    _RECENCY_PHRASE_RE = re.compile(r'\b(?:(this (?:week|month))|(last (?:hour|day|week|month)))\b')
+    
+    # Signal category -> name of the class attribute holding its {pattern: weight} dict
+    _SIGNAL_CATEGORIES = {
+        "shopping": "SHOPPING_SIGNALS",
+        "research": "RESEARCH_SIGNALS",
+        "discovery": "DISCOVERY_SIGNALS",
+        "local_news": "LOCAL_NEWS_SIGNALS",
+        "rag": "RAG_SIGNALS",
+        "privacy": "PRIVACY_SIGNALS",
+        "social": "SOCIAL_SIGNALS",
+    }
+    
+    # Signal categories each provider's score is built from
+    _PROVIDER_CATEGORIES = {
+        "serper": ("shopping", "local_news"),
+        "tavily": ("research",),
+        "exa": ("discovery",),
+        "you": ("rag",),
+        "searxng": ("privacy",),
+        "github": ("social",),
+        "reddit": ("social",),
+        "twitter": ("social",),
+        "linuxdo": ("social",),
+    }
+    # Social providers don't need API keys
+    _SOCIAL_PROVIDERS = KEYLESS_PROVIDERS
+    # A lead at which route() starts skipping categories that can't matter
+    # (the confidence score saturates at ~15)
+    DOMINANT_SCORE = 15.0
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.auto_config = config.get("auto_routing", DEFAULT_CONFIG["auto_routing"])
+        self._compiled = self._compile_signals()
+        self._regex_scan = self._REGEX_SCAN
+        self._weights = self._WEIGHTS
+        self._pattern_ids = self._PATTERN_IDS
+        self._required_literals = self._REQUIRED_LITERALS
+        self._literal_automaton = self._LITERAL_AUTOMATON
+        self._word_keywords = self._WORD_KEYWORDS
+        self._substring_keywords = self._SUBSTRING_KEYWORDS
+        self._hs = self._HS_DATABASES
+    
+    @classmethod
+    def _compile_signals(cls) -> Dict[str, List[Tuple[re.Pattern, float]]]:
+        """
+        Compile every signal dict into (regex, weight) pairs and the matchers
+        built on top of them. Runs once per class; all instances share the result.
+        
+        - cls._PATTERN_IDS: per category, the id of each pattern in a catalog of
+          unique patterns, so a pattern shared by several categories is run once
+        - cls._REQUIRED_LITERALS: per category, a substring every match of each
+          pattern must contain (or None), checked with `in` before the regex runs
+        - cls._HS_DATABASES: one Hyperscan database per category (if installed)
+        - cls._LITERAL_AUTOMATON: plain keywords of every category in one
+          Aho-Corasick automaton (if pyahocorasick is installed and Hyperscan isn't)
+        - otherwise, without Hyperscan, cls._WORD_KEYWORDS maps single-word
+          r'\\bword\\b' patterns for a token-set lookup and cls._SUBSTRING_KEYWORDS
+          lists bare literals for an `in` check
+        - cls._REGEX_SCAN[category, has_cjk]: (indices, fused) for the remaining
+          patterns, where fused is one alternation used as a pre-check and the
+          has_cjk=False variant leaves out CJK-only patterns
+        """
+        if "_COMPILED" not in cls.__dict__:
+            cls._COMPILED = {
+                category: [
+                    (re.compile(pattern), weight)
+                    for pattern, weight in getattr(cls, attr).items()
+                ]
+                for category, attr in cls._SIGNAL_CATEGORIES.items()
+            }
+            cls._WEIGHTS = {
+                category: tuple(getattr(cls, attr).values())
+                for category, attr in cls._SIGNAL_CATEGORIES.items()
+            }
+            catalog = {}  # pattern -> id
+            cls._PATTERN_IDS = {
+                category: tuple(catalog.setdefault(pattern, len(catalog)) for pattern in getattr(cls, attr))
+                for category, attr in cls._SIGNAL_CATEGORIES.items()
+            }
+            cls._CATEGORY_PROVIDERS = {
+                category: tuple(p for p, sources in cls._PROVIDER_CATEGORIES.items() if category in sources)
+                for category in cls._SIGNAL_CATEGORIES
+            }
+            cls._REQUIRED_LITERALS = {
+                category: tuple(cls._required_literal(pattern) for pattern in getattr(cls, attr))
+                for category, attr in cls._SIGNAL_CATEGORIES.items()
+            }
+            use_automaton = ahocorasick is not None and hyperscan is None
+            keywords = {}  # keyword -> [(category, index, length, bounded)]
+            cls._WORD_KEYWORDS = {}  # word -> [(category, index)]
+            cls._SUBSTRING_KEYWORDS = []  # [(category, index, literal)]
+            cls._REGEX_SCAN = {}
+            for category, attr in cls._SIGNAL_CATEGORIES.items():
+                patterns = list(getattr(cls, attr))
+                literal_indices = set()
+                for i, pattern in enumerate(patterns):
+                    literal = cls._as_literal(pattern) if hyperscan is None else None
+                    if literal is None:
+                        continue
+                    keyword, bounded = literal
+                    if use_automaton:
+                        keywords.setdefault(keyword, []).append((category, i, len(keyword), bounded))
+                    elif not bounded:
+                        cls._SUBSTRING_KEYWORDS.append((category, i, keyword))
+                    elif _WORD_TOKEN_RE.fullmatch(keyword):
+                        cls._WORD_KEYWORDS.setdefault(keyword, []).append((category, i))
+                    else:
+                        continue  # multi-word r'\bhow much\b' stays a regex here
+                    literal_indices.add(i)
+                for has_cjk in (True, False):
+                    indices = [
+                        i for i, pattern in enumerate(patterns)
+                        if i not in literal_indices and (has_cjk or not cls._is_cjk_only(pattern))
+                    ]
+                    fused = cls._fuse_patterns([patterns[i] for i in indices]) if indices else None
+                    cls._REGEX_SCAN[category, has_cjk] = (indices, fused)
+            cls._LITERAL_AUTOMATON = None
+            if keywords:
+                cls._LITERAL_AUTOMATON = ahocorasick.Automaton()
+                for keyword, entries in keywords.items():
+                    cls._LITERAL_AUTOMATON.add_word(keyword, tuple(entries))
+                cls._LITERAL_AUTOMATON.make_automaton()
+            cls._HS_DATABASES = {
+                category: cls._build_hs_database(list(getattr(cls, attr)))
+                for category, attr in cls._SIGNAL_CATEGORIES.items()
+            } if hyperscan is not None else {}
+        return cls._COMPILED
+    
+    @staticmethod
+    def _build_hs_database(patterns: List[str]) -> Optional[Tuple[Any, List[int]]]:
+        """
+        Compile the patterns Hyperscan supports into one database.
+        Returns (database, indices Hyperscan can't handle) or None if nothing compiled.
+        Unsupported patterns (e.g. lookaheads) are always checked with re.
+        
+        Hyperscan has no Unicode \\b (UCP mode rejects it), so classes are ASCII.
+        A pattern only goes into the database if ASCII semantics can report
+        extra matches but never miss one that re would find; the rest are
+        treated as unsupported. So are non-ASCII patterns with a dot: a dot
+        spanning multi-byte UTF-8 can miss matches in longer queries.
+        """
+        flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8
+        supported, unsupported = [], []
+        for i, pattern in enumerate(patterns):
+            if _HS_UNSAFE_RE.search(pattern) or (not pattern.isascii() and ('\\b' in pattern or '.' in pattern)):
+                unsupported.append(i)
+                continue
+            expr = pattern.encode("utf-8")
+            try:
+                hyperscan.Database().compile(expressions=[expr], ids=[i], elements=1, flags=[flags])
+            except Exception:
+                unsupported.append(i)
+            else:
+                supported.append((expr, i))
+        if not supported:
+            return None
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[expr for expr, _ in supported],
+            ids=[i for _, i in supported],
+            elements=len(supported),
+            flags=[flags] * len(supported),
+        )
+        return db, unsupported
+    
+    @staticmethod
+    def _as_literal(pattern: str) -> Optional[Tuple[str, bool]]:
+        """
+        Return (keyword, needs_word_boundary) if the pattern is a plain keyword
+        (r'\\bhow much\\b' or a bare literal like '价格'), else None.
+        """
+        m = _BOUNDED_KEYWORD_PATTERN_RE.fullmatch(pattern)
+        if m:
+            return m.group(1).lower(), True
+        if re.escape(pattern) == pattern:
+            return pattern.lower(), False
+        return None
+    
+    @staticmethod
+    def _required_literal(pattern: str) -> Optional[str]:
+        """
+        Return the longest run of plain characters outside any group, class or
+        escape in a pattern without top-level alternation (e.g. 'where to' for
+        r'\\bwhere to (buy|get)\\b'). Every match contains it, so a query
+        lacking it can skip the regex. None if no run of 2+ characters exists.
+        """
+        runs = []
+        run = ""
+        depth = 0
+        i = 0
+        while i < len(pattern):
+            c = pattern[i]
+            if c == "\\":
+                i += 1  # escaped character: never part of a run
+            elif c == "[":
+                i += 1
+                if i < len(pattern) and pattern[i] == "^":
+                    i += 1
+                if i < len(pattern) and pattern[i] == "]":
+                    i += 1
+                while i < len(pattern) and pattern[i] != "]":
+                    i += 2 if pattern[i] == "\\" else 1
+            elif c == "(":
+                depth += 1
+            elif c == ")":
+                depth -= 1
+            elif c == "|" and depth == 0:
+                return None
+            elif depth == 0 and (c.isalnum() or c in " _'-/:,@#%"):
+                run += c
+                i += 1
+                continue
+            elif c in "?*+{":
+                run = run[:-1]  # the quantifier applies to the last character only
+                if c == "{":
+                    i = max(pattern.find("}", i), i)  # counts aren't literal text
+            runs.append(run)
+            run = ""
+            i += 1
+        runs.append(run)
+        best = max(runs, key=len)
+        return best if len(best) >= 2 else None
+    
+    def _scan_literals(self, query_lower: str) -> Dict[str, Dict[int, str]]:
+        """
+        Match the plain keywords of every category in one pass over the query:
+        the Aho-Corasick automaton if built, else a token set for single words
+        and substring checks for bare literals.
+        Returns {category: {pattern index: matched text}}.
+        """
+        hits = {}
+        if self._literal_automaton is None:
+            if not self._word_keywords and not self._substring_keywords:
+                return hits  # Hyperscan handles every pattern
+            # r'\bword\b' matches exactly when word is one of the query's maximal \w runs
+            for token in set(_WORD_TOKEN_RE.findall(query_lower)):
+                for category, index in self._word_keywords.get(token, ()):
+                    hits.setdefault(category, {})[index] = token
+            for category, index, literal in self._substring_keywords:
+                if literal in query_lower:
+                    hits.setdefault(category, {})[index] = literal
+            return hits
+        for end, entries in self._literal_automaton.iter(query_lower):
+            for category, index, length, bounded in entries:
+                category_hits = hits.setdefault(category, {})
+                if index in category_hits:
+                    continue
+                start = end - length + 1
+                if bounded and not _is_word_bounded(query_lower, start, end + 1):
+                    continue
+                category_hits[index] = query_lower[start:end + 1]
+        return hits
+    
+    @staticmethod
+    def _is_cjk_only(pattern: str) -> bool:
+        """True if every match of the pattern must contain a CJK character."""
+        if not _CJK_RE.search(pattern):
+            return False
+        if re.escape(pattern) == pattern:
+            return True  # plain literal such as 'L站'
+        return bool(_CJK_ONLY_PATTERN_RE.fullmatch(pattern)) and not re.fullmatch(pattern, '')
+    
+    @staticmethod
+    def _fuse_patterns(patterns) -> Optional[re.Pattern]:
+        """
+        Join patterns into one alternation that matches iff any of them does.
+        Returns None if they can't be combined (the category is then always scanned).
+        """
+        parts = [f"(?:{p})" for p in patterns]
+        try:
+            return re.compile("|".join(parts))
+        except re.error:
+            return None
     
     def _calculate_signal_score(
         self, 
-        query: str, 
-        signals: Dict[str, float]
-    ) -> Tuple[float, List[Dict[str, Any]]]:
+        query_lower: str, 
+        category: str,
+        has_cjk: bool = True,
+        literal_hits: Optional[Dict[int, str]] = None,
+        pattern_hits: Optional[Dict[int, Optional[str]]] = None
+    ) -> Tuple[float, List[SignalMatch]]:
         """
-        Calculate score for a signal category.
+        Calculate score for a signal category against the lowercased query.
         Returns (total_score, list of matched signals with details).
+        
+        With Hyperscan available, one database scan tells which patterns match
+        and only those are re-run with re to extract the matched text.
+        Otherwise plain keywords arrive pre-matched in literal_hits (from the
+        shared automaton) and the remaining patterns' fused regex is tried
+        first: if it finds nothing, none of them can match. The fused match
+        alone can't report every hit (alternation stops at the first
+        alternative and never returns overlapping matches), so on a hit each
+        pattern is still checked. Queries without CJK characters skip the
+        category's CJK-only patterns.
+        
+        pattern_hits, shared by the categories of one analysis, records each
+        checked pattern's matched text (None for no match) by catalog id so a
+        pattern that appears in several categories is only run once.
         """
-        query_lower = query.lower()
-        matches = []
-        total_score = 0.0
-        
-        for pattern, weight in signals.items():
-            regex = re.compile(pattern, re.IGNORECASE)
-            found = regex.findall(query_lower)
-            if found:
-                # Normalize found matches
-                match_text = found[0] if isinstance(found[0], str) else found[0][0] if found[0] else pattern
-                matches.append({
-                    "pattern": pattern,
-                    "matched": match_text,
-                    "weight": weight
-                })
-                total_score += weight
+        compiled = self._compiled[category]
+        found_text = dict(literal_hits) if literal_hits else {}
+        
+        hs = self._hs.get(category)
+        if hs is not None:
+            db, unsupported = hs
+            hits = set(unsupported)
+            db.scan(query_lower.encode("utf-8"), match_event_handler=_hs_collect, context=hits)
+            indices = sorted(hits)
+        else:
+            indices, fused = self._regex_scan[category, has_cjk]
+            if fused is not None and not fused.search(query_lower):
+                indices = ()
+        
+        if pattern_hits is None:
+            pattern_hits = {}
+        pattern_ids = self._pattern_ids[category]
+        required = self._required_literals[category]
+        for i in indices:
+            pattern_id = pattern_ids[i]
+            if pattern_id in pattern_hits:
+                text = pattern_hits[pattern_id]
+            elif required[i] is not None and required[i] not in query_lower:
+                # Cheap substring check rules the pattern out
+                text = pattern_hits[pattern_id] = None
+            else:
+                regex = compiled[i][0]
+                found = regex.findall(query_lower)
+                text = None
+                if found:
+                    # Normalize found matches
+                    text = found[0] if isinstance(found[0], str) else found[0][0] if found[0] else regex.pattern
+                pattern_hits[pattern_id] = text
+            if text is not None:
+                found_text[i] = text
+        
+        # Report in signal-dict order regardless of which matcher found the hit;
+        # the score is summed in C over the category's packed weight tuple
+        hit_indices = sorted(found_text)
+        weights = self._weights[category]
+        total_score = sum(map(weights.__getitem__, hit_indices), 0.0)
+        matches = [
+            SignalMatch(compiled[i][0].pattern, found_text[i], weights[i])
+            for i in hit_indices
+        ]
         
         return total_score, matches
     
-    def _detect_product_brand_combo(self, query: str) -> float:
+    def _detect_product_brand_combo(self, query_lower: str) -> float:
         """
         Detect product + brand combinations which strongly indicate shopping intent.
         Returns a bonus score.
         """
-        query_lower = query.lower()
-        brand_found = False
-        product_found = False
-        
-        for pattern in self.BRAND_PATTERNS:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                brand_found = True
-                break
+        if not self._BRAND_RE.search(query_lower):
+            return 0.0
         
         # Check for product indicators
-        product_indicators = [
-            r'\b(buy|price|specs?|review|vs|compare)\b',
-            r'\b(pro|max|plus|mini|ultra|lite)\b',  # Product tier names
-            r'\b\d+\s*(gb|tb|inch|mm|hz)\b',  # Specifications
-        ]
-        for pattern in product_indicators:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                product_found = True
-                break
-        
-        if brand_found and product_found:
+        if self._PRODUCT_INDICATOR_RE.search(query_lower):
             return 3.0  # Strong shopping signal
-        elif brand_found:
-            return 1.5  # Moderate shopping signal
-        return 0.0
+        return 1.5  # Moderate shopping signal
     
     def _detect_url(self, query: str) -> Optional[str]:
         """Detect URLs in query - strong signal for Exa similar search."""
-        url_pattern = r'https?://[^\s]+'
-        match = re.search(url_pattern, query)
-        if match:
-            return match.group()
-        
-        # Also check for domain-like patterns
-        domain_pattern = r'\b(\w+\.(com|org|io|ai|co|dev|net|app))\b'
-        match = re.search(domain_pattern, query, re.IGNORECASE)
-        if match:
-            return match.group()
+        match = self._URL_RE.search(query)
+        if match is None:
+            return None
+        if match.group(1):
+            return match.group(1)
         
-        return None
+        # A bare domain came first; an explicit URL later on still wins
+        url = self._HTTP_URL_RE.search(query, match.end())
+        return url.group() if url else match.group(2)
     
-    def _assess_query_complexity(self, query: str) -> Dict[str, Any]:
+    def _assess_query_terms(self, query_lower: str) -> Tuple[Dict[str, Any], bool, float]:
         """
-        Assess query complexity - complex queries favor Tavily.
+        Assess query complexity (complex queries favor Tavily) and recency
+        intent from a single tokenization of the lowercased query.
+        Returns (complexity, is_recency_focused, recency_score).
         """
-        words = query.split()
-        word_count = len(words)
+        word_count = len(query_lower.split())
+        tokens = _WORD_TOKEN_RE.findall(query_lower)
         
-        # Count question words
-        question_words = len(re.findall(
-            r'\b(what|why|how|when|where|which|who|whose|whom)\b', 
-            query, re.IGNORECASE
-        ))
-        
-        # Check for multiple clauses
-        clause_markers = len(re.findall(
-            r'\b(and|but|or|because|since|while|although|if|when)\b',
-            query, re.IGNORECASE
-        ))
+        # Count question words and clause markers
+        question_words = sum(1 for t in tokens if t in self._QUESTION_WORDS)
+        clause_markers = sum(1 for t in tokens if t in self._CLAUSE_WORDS)
         
         complexity_score = 0.0
         if word_count > 10:
@@ -968,36 +1807,26 @@ class QueryAnalyzer:
         if clause_markers > 0:
             complexity_score += 0.5 * clause_markers
         
-        return {
+        complexity = {
             "word_count": word_count,
             "question_words": question_words,
             "clause_markers": clause_markers,
             "complexity_score": complexity_score,
             "is_complex": complexity_score > 2.0
         }
-    
-    def _detect_recency_intent(self, query: str) -> Tuple[bool, float]:
-        """
-        Detect if query wants recent/timely information.
-        Returns (is_recency_focused, score).
-        """
-        recency_patterns = [
-            (r'\b(latest|newest|recent|current)\b', 2.5),
-            (r'\b(today|yesterday|this week|this month)\b', 3.0),
-            (r'\b(202[4-9]|2030)\b', 2.0),
-            (r'\b(breaking|live|just|now)\b', 3.0),
-            (r'\blast (hour|day|week|month)\b', 2.5),
-        ]
         
-        total = 0.0
-        for pattern, weight in recency_patterns:
-            if re.search(pattern, query, re.IGNORECASE):
-                total += weight
+        # Recency: each group counts once, via a word token or its phrase
+        token_set = set(tokens)
+        phrases = {m.lastindex for m in self._RECENCY_PHRASE_RE.finditer(query_lower)}
+        recency_score = 0.0
+        for words, phrase, weight in self._RECENCY_GROUPS:
+            if phrase in phrases or not token_set.isdisjoint(words):
+                recency_score += weight
         
-        return total > 2.0, total
+        return complexity, recency_score > 2.0, recency_score
     
     def _sub_route_social(
-        self, query: str, social_score: float, social_matches: List[Dict]
+        self, query_lower: str, social_score: float, social_matches: List[SignalMatch]
     ) -> Tuple[float, float, float, float]:
         """
         Sub-route social signals to specific platforms: github, reddit, twitter, linuxdo.
@@ -1006,46 +1835,16 @@ class QueryAnalyzer:
         if social_score == 0:
             return 0.0, 0.0, 0.0, 0.0
 
-        q = query.lower()
-        github_score = 0.0
-        reddit_score = 0.0
-        twitter_score = 0.0
-        linuxdo_score = 0.0
-
-        # Platform-specific keyword detection
-        github_kw = [
-            r'\bgithub\b', r'\btrending\s+(repos?|repositories|projects?)\b',
-            r'\bstars?\b', r'\bgit\b', r'\bopen.?source\b',
-        ]
-        reddit_kw = [
-            r'\breddit\b', r'\bsubreddit\b', r'\br/\w+',
-            r'\bupvote\b', r'\bredditor\b',
-        ]
-        twitter_kw = [
-            r'\btwitter\b', r'\btweet\b', r'\b𝕏\b', r'\bx\.com\b',
-            r'#\w{2,}', r'@\w{2,}',
-        ]
-        linuxdo_kw = [
-            r'(?i)linux[\s._-]?do', r'L站',
-            r'开发调优', r'资源荟萃', r'非我莫属', r'扬帆起航', r'跳蚤市场',
-        ]
-
-        for pat in github_kw:
-            if re.search(pat, q, re.IGNORECASE):
-                github_score += social_score
-                break
-        for pat in reddit_kw:
-            if re.search(pat, q, re.IGNORECASE):
-                reddit_score += social_score
-                break
-        for pat in twitter_kw:
-            if re.search(pat, q, re.IGNORECASE):
-                twitter_score += social_score
-                break
-        for pat in linuxdo_kw:
-            if re.search(pat, q, re.IGNORECASE):
-                linuxdo_score += social_score
-                break
+        # Platforms already implied by the social scan; only scan keywords for the rest
+        platforms = {self._SOCIAL_PATTERN_PLATFORM.get(m.pattern) for m in social_matches}
+        platforms.discard(None)
+        if len(platforms) < 4:
+            # Platform-specific keyword detection (single keyword scan, memoized per query)
+            platforms.update(_detect_social_platforms(query_lower))
+        github_score = social_score if "github" in platforms else 0.0
+        reddit_score = social_score if "reddit" in platforms else 0.0
+        twitter_score = social_score if "twitter" in platforms else 0.0
+        linuxdo_score = social_score if "linuxdo" in platforms else 0.0
 
         # If no specific platform detected but social intent exists,
         # distribute score to all (generic "trending" / "community")
@@ -1061,66 +1860,116 @@ class QueryAnalyzer:
         """
         Perform comprehensive query analysis.
         Returns detailed analysis with scores for each provider.
+        
+        Analysis depends only on the query (not on config), so results are
+        memoized per analyzer class; each call gets a fresh, mutable copy with
+        the match details of every provider.
         """
+        analysis = _thaw(_analyze_cached(type(self), query))
+        del analysis["pruned_categories"]  # always empty for a full scan
+        signal_matches = analysis.pop("signal_matches")
+        match_sources = analysis.pop("match_sources")
+        analysis["provider_matches"] = {
+            provider: [m._asdict() for m in self._provider_matches(signal_matches, sources)]
+            for provider, sources in match_sources.items()
+        }
+        return analysis
+    
+    @staticmethod
+    def _provider_matches(signal_matches: Dict[str, Any], sources: Sequence[str]) -> List[SignalMatch]:
+        """Assemble one provider's match list from its source categories."""
+        return [m for category in sources for m in signal_matches[category]]
+    
+    def _analyze(self, query: str, available: Optional[frozenset] = None) -> Dict[str, Any]:
+        """
+        Uncached analysis behind analyze() and route().
+        
+        With available=None every category is scanned. route() passes its
+        available providers instead: categories that feed none of them are
+        skipped, and once a provider leads with DOMINANT_SCORE or more, so is
+        any category that can't lift one of its providers into the top two
+        (see _can_skip_category). Skipped categories score 0.0 with no matches;
+        the ones skipped for that last reason are listed in pruned_categories,
+        since the scores of providers they feed are only lower bounds.
+        """
+        # Every matcher except URL detection works on the lowercased query
+        query_lower = query.lower()
+        # CJK-only patterns can be skipped for queries without CJK characters
+        has_cjk = _CJK_RE.search(query_lower) is not None
+        # Plain keywords of all categories are matched in one pass
+        literal_hits = self._scan_literals(query_lower)
+        # Regex results shared across categories, by pattern catalog id
+        pattern_hits = {}
+        
+        # Query-level signals are cheap, so they come first for the early exit
+        brand_bonus = self._detect_product_brand_combo(query_lower)
+        detected_url = self._detect_url(query)
+        complexity, is_recency, recency_score = self._assess_query_terms(query_lower)
+        
         # Calculate scores for each intent category
-        shopping_score, shopping_matches = self._calculate_signal_score(
-            query, self.SHOPPING_SIGNALS
-        )
-        research_score, research_matches = self._calculate_signal_score(
-            query, self.RESEARCH_SIGNALS
-        )
-        discovery_score, discovery_matches = self._calculate_signal_score(
-            query, self.DISCOVERY_SIGNALS
-        )
-        local_news_score, local_news_matches = self._calculate_signal_score(
-            query, self.LOCAL_NEWS_SIGNALS
-        )
-        rag_score, rag_matches = self._calculate_signal_score(
-            query, self.RAG_SIGNALS
-        )
-        privacy_score, privacy_matches = self._calculate_signal_score(
-            query, self.PRIVACY_SIGNALS
-        )
-        social_score, social_matches = self._calculate_signal_score(
-            query, self.SOCIAL_SIGNALS
-        )
+        skipped = frozenset() if available is None else _skipped_categories(type(self), available)
+        early_exit = available is not None and len(available) > 1
+        if early_exit:
+            # Provider score contributions that don't come from category scans
+            base_scores = {
+                "serper": brand_bonus + recency_score * 0.5,
+                "tavily": complexity["complexity_score"],
+                "exa": 5.0 if detected_url else 0.0,
+                "you": recency_score * 0.3,
+            }
+            base_scores = {p: base_scores.get(p, 0.0) for p in available}
+            bounds = {}
+            
+            def bound(category: str) -> float:
+                if category not in bounds:
+                    bounds[category] = self._category_bound(query_lower, category, has_cjk, literal_hits)
+                return bounds[category]
+        
+        results = {}
+        scanned = {}  # category -> score, for categories actually scanned
+        pruned = []  # categories skipped by the early exit
+        for category in self._SIGNAL_CATEGORIES:
+            if category in skipped:
+                results[category] = (0.0, [])
+                continue
+            if early_exit and self._can_skip_category(category, base_scores, scanned, bound):
+                results[category] = (0.0, [])
+                pruned.append(category)
+                continue
+            results[category] = self._calculate_signal_score(
+                query_lower, category, has_cjk, literal_hits.get(category), pattern_hits
+            )
+            scanned[category] = results[category][0]
+        shopping_score, shopping_matches = results["shopping"]
+        research_score, research_matches = results["research"]
+        discovery_score, discovery_matches = results["discovery"]
+        local_news_score, local_news_matches = results["local_news"]
+        rag_score, rag_matches = results["rag"]
+        privacy_score, privacy_matches = results["privacy"]
+        social_score, social_matches = results["social"]
 
         # Apply product/brand bonus to shopping
-        brand_bonus = self._detect_product_brand_combo(query)
         if brand_bonus > 0:
             shopping_score += brand_bonus
-            shopping_matches.append({
-                "pattern": "product_brand_combo",
-                "matched": "brand + product detected",
-                "weight": brand_bonus
-            })
+            shopping_matches.append(SignalMatch("product_brand_combo", "brand + product detected", brand_bonus))
         
         # Detect URL → strong Exa signal
-        detected_url = self._detect_url(query)
         if detected_url:
             discovery_score += 5.0
-            discovery_matches.append({
-                "pattern": "url_detected",
-                "matched": detected_url,
-                "weight": 5.0
-            })
-        
-        # Assess complexity → favors Tavily
-        complexity = self._assess_query_complexity(query)
+            discovery_matches.append(SignalMatch("url_detected", detected_url, 5.0))
+        
+        # Complexity favors Tavily
         if complexity["is_complex"]:
             research_score += complexity["complexity_score"]
-            research_matches.append({
-                "pattern": "query_complexity",
-                "matched": f"complex query ({complexity['word_count']} words)",
-                "weight": complexity["complexity_score"]
-            })
+            research_matches.append(SignalMatch(
+                "query_complexity",
+                f"complex query ({complexity['word_count']} words)",
+                complexity["complexity_score"],
+            ))
         
-        # Check recency intent
-        is_recency, recency_score = self._detect_recency_intent(query)
-
         # Sub-route social signals to specific platforms
         github_score, reddit_score, twitter_score, linuxdo_score = self._sub_route_social(
-            query, social_score, social_matches
+            query_lower, social_score, social_matches
         )
 
         # Map intents to providers with final scores
@@ -1136,64 +1985,135 @@ class QueryAnalyzer:
             "linuxdo": linuxdo_score,
         }
 
-        # Build match details per provider
-        provider_matches = {
-            "serper": shopping_matches + local_news_matches,
-            "tavily": research_matches,
-            "exa": discovery_matches,
-            "you": rag_matches,
-            "searxng": privacy_matches,
-            "github": social_matches if github_score > 0 else [],
-            "reddit": social_matches if reddit_score > 0 else [],
-            "twitter": social_matches if twitter_score > 0 else [],
-            "linuxdo": social_matches if linuxdo_score > 0 else [],
+        # Match details are kept once per category; each provider only records
+        # which categories feed it, and its list is assembled on demand
+        # (see _provider_matches)
+        signal_matches = {
+            "shopping": shopping_matches,
+            "local_news": local_news_matches,
+            "research": research_matches,
+            "discovery": discovery_matches,
+            "rag": rag_matches,
+            "privacy": privacy_matches,
+            "social": social_matches,
+        }
+        match_sources = {
+            provider: () if provider in self._SOCIAL_PROVIDERS and provider_scores[provider] <= 0 else categories
+            for provider, categories in self._PROVIDER_CATEGORIES.items()
         }
         
         return {
             "query": query,
             "provider_scores": provider_scores,
-            "provider_matches": provider_matches,
+            "signal_matches": signal_matches,
+            "match_sources": match_sources,
             "detected_url": detected_url,
             "complexity": complexity,
             "recency_focused": is_recency,
             "recency_score": recency_score,
+            "pruned_categories": pruned,
         }
     
-    def route(self, query: str) -> Dict[str, Any]:
+    def _category_bound(
+        self, query_lower: str, category: str, has_cjk: bool, literal_hits: Dict[str, Dict[int, str]]
+    ) -> float:
+        """
+        Upper bound on a category's signal score without running its regexes:
+        the weights of its matched plain keywords plus those of every remaining
+        pattern whose required literal occurs in the query.
+        """
+        weights = self._weights[category]
+        required = self._required_literals[category]
+        indices, _ = self._regex_scan[category, has_cjk]
+        total = sum(weights[i] for i in literal_hits.get(category, ()))
+        return total + sum(weights[i] for i in indices if required[i] is None or required[i] in query_lower)
+    
+    def _can_skip_category(
+        self,
+        category: str,
+        base_scores: Dict[str, float],
+        scanned: Dict[str, float],
+        bound: Callable[[str], float],
+    ) -> bool:
+        """
+        Early exit for route(): True if no available provider fed by category
+        can reach the top two, so scanning it can't change the winner or the
+        runner-up score that confidence is based on.
+        
+        base_scores holds each available provider's non-category contributions
+        and scanned the scores of categories scanned so far, giving lower bounds
+        for the providers; bound(category) caps what an unscanned category can
+        still add. Only tried once some provider reaches DOMINANT_SCORE.
+        """
+        lower = {
+            p: base + sum(scanned[c] for c in self._PROVIDER_CATEGORIES[p] if c in scanned)
+            for p, base in base_scores.items()
+        }
+        first, second = heapq.nlargest(2, lower.values())
+        if first < self.DOMINANT_SCORE:
+            return False
+        for provider in self._CATEGORY_PROVIDERS[category]:
+            if provider not in lower:
+                continue
+            # Social sub-routing never gives a platform more than the social score
+            pending = sum(bound(c) for c in self._PROVIDER_CATEGORIES[provider] if c not in scanned)
+            if lower[provider] + pending >= second - 1e-9:
+                return False
+        return True
+    
+    @staticmethod
+    def _score_confidence(max_score: float, second_best: float) -> Tuple[float, float]:
+        """
+        Confidence inputs for a winning score.
+        Returns (normalized_score, margin):
+        1. Absolute score (is it strong enough?), normalized to 0-1 assuming
+           a max reasonable score of ~15
+        2. Relative margin over the runner-up (is there a clear winner?)
+        """
+        if max_score <= 0:
+            return 0.0, 0
+        return min(max_score / 15.0, 1.0), (max_score - second_best) / max_score
+    
+    def route(self, query: str, explain: bool = False) -> Dict[str, Any]:
         """
         Route query to optimal provider with confidence scoring.
+        
+        Reads the memoized analysis directly and only assembles the match
+        details of the winning provider. Unless explain is set, signal
+        categories that only feed disabled or keyless providers, or that can't
+        affect the outcome once a provider clearly leads, are not scanned.
+        Providers fed by a category skipped for the latter reason only have a
+        lower bound for a score: "scores" reports that bound and "pruned" lists
+        them.
         """
-        analysis = self.analyze(query)
-        scores = analysis["provider_scores"]
+        auto_config = self.auto_config
         
         # Filter to available providers
-        disabled = set(self.auto_config.get("disabled_providers", []))
-        # Social providers (github, reddit, twitter) don't need API keys
-        social_providers = {"github", "reddit", "twitter", "linuxdo"}
-        available = {
-            p: s for p, s in scores.items()
-            if p not in disabled and (p in social_providers or get_api_key(p, self.config))
-        }
+        available_providers = frozenset(get_available_providers(self.config))
+        analysis = dict(_analyze_cached(type(self), query, None if explain else available_providers))
+        scores = dict(analysis["provider_scores"])
+        available = {p: s for p, s in scores.items() if p in available_providers}
         
         if not available:
             # No providers available, use fallback
-            fallback = self.auto_config.get("fallback_provider", "serper")
+            fallback = auto_config.get("fallback_provider", "serper")
+            full_analysis = self.analyze(query)
             return {
                 "provider": fallback,
                 "confidence": 0.0,
                 "confidence_level": "low",
                 "reason": "no_available_providers",
-                "scores": scores,
+                "scores": full_analysis["provider_scores"],
                 "top_signals": [],
-                "analysis": analysis,
+                "analysis": full_analysis,
             }
         
-        # Find the winner
-        max_score = max(available.values())
-        total_score = sum(available.values()) or 1.0
+        # Find the winner; the two best scores are all the confidence needs
+        top_two = heapq.nlargest(2, available.values())
+        max_score = top_two[0]
         
         # Handle ties using priority
-        priority = self.auto_config.get("provider_priority", ["serper", "tavily", "exa", "you", "searxng"])
+        priority = auto_config.get("provider_priority", ["serper", "tavily", "exa", "you", "searxng"])
         winners = [p for p, s in available.items() if s == max_score]
         
         if len(winners) > 1:
@@ -1213,14 +2133,8 @@ class QueryAnalyzer:
             confidence = 0.0
             reason = "no_signals_matched"
         else:
-            # Confidence based on:
-            # 1. Absolute score (is it strong enough?)
-            # 2. Relative margin (is there a clear winner?)
-            second_best = sorted(available.values(), reverse=True)[1] if len(available) > 1 else 0
-            margin = (max_score - second_best) / max_score if max_score > 0 else 0
-            
-            # Normalize score to 0-1 range (assuming max reasonable score ~15)
-            normalized_score = min(max_score / 15.0, 1.0)
+            second_best = top_two[1] if len(top_two) > 1 else 0
+            normalized_score, margin = self._score_confidence(max_score, second_best)
             
             # Confidence is combination of absolute strength and relative margin
             confidence = round((normalized_score * 0.6 + margin * 0.4), 3)
@@ -1233,8 +2147,10 @@ class QueryAnalyzer:
                 reason = "low_confidence_match"
         
         # Get top signals for the winning provider
-        matches = analysis["provider_matches"].get(winner, [])
-        top_signals = sorted(matches, key=lambda x: x["weight"], reverse=True)[:5]
+        matches = self._provider_matches(
+            dict(analysis["signal_matches"]), dict(analysis["match_sources"]).get(winner, ())
+        )
+        top_signals = heapq.nlargest(5, matches, key=lambda m: m.weight)
         
         # Special case: URL detected and Exa available → strong recommendation
         if analysis["detected_url"] and "exa" in available:
@@ -1244,7 +2160,14 @@ class QueryAnalyzer:
                 pass  # Keep current winner but note it
         
         # Build detailed routing result
-        threshold = self.auto_config.get("confidence_threshold", 0.3)
+        threshold = auto_config.get("confidence_threshold", 0.3)
+        # The early exit never prunes a category feeding the top two, so the
+        # winner and runner-up always keep their exact scores
+        pruned = set(analysis["pruned_categories"])
+        inexact = [
+            p for p in available
+            if pruned.intersection(self._PROVIDER_CATEGORIES[p])
+        ] if pruned else []
         
         return {
             "provider": winner,
@@ -1252,28 +2175,97 @@ class QueryAnalyzer:
             "confidence_level": "high" if confidence >= 0.7 else "medium" if confidence >= 0.4 else "low",
             "reason": reason,
             "scores": {p: round(s, 2) for p, s in available.items()},
+            "pruned": inexact,
             "winning_score": round(max_score, 2),
             "top_signals": [
-                {"matched": s["matched"], "weight": s["weight"]} 
+                {"matched": s.matched, "weight": s.weight}
                 for s in top_signals
             ],
             "below_threshold": confidence < threshold,
             "analysis_summary": {
                 "query_length": len(query.split()),
-                "is_complex": analysis["complexity"]["is_complex"],
+                "is_complex": dict(analysis["complexity"])["is_complex"],
                 "has_url": analysis["detected_url"] is not None,
                 "recency_focused": analysis["recency_focused"],
             }
         }
 
 
+class _FrozenDict(tuple):
+    """A dict frozen into a tuple of (key, value) pairs, for cached analyses."""
+
+
+def _freeze(obj: Any) -> Any:
+    """Recursively turn dicts/lists into hashable, immutable tuples."""
+    if isinstance(obj, dict):
+        return _FrozenDict((k, _freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _thaw(obj: Any) -> Any:
+    """Inverse of _freeze: rebuild fresh dicts/lists."""
+    if type(obj) is _FrozenDict:
+        return {k: _thaw(v) for k, v in obj}
+    if type(obj) is tuple:
+        return [_thaw(v) for v in obj]
+    return obj
+
+
+@lru_cache(maxsize=4096)
+def _analyze_cached(analyzer_cls: type, query: str, available: Optional[frozenset] = None) -> _FrozenDict:
+    """Analysis for one query, frozen so the cached value can't be mutated by callers."""
+    return _freeze(analyzer_cls(DEFAULT_CONFIG)._analyze(query, available))
+
+
+@lru_cache(maxsize=64)
+def _skipped_categories(analyzer_cls: type, available_providers: frozenset) -> frozenset:
+    """Signal categories that feed none of the available providers."""
+    needed = {
+        category
+        for provider in available_providers
+        for category in analyzer_cls._PROVIDER_CATEGORIES[provider]
+    }
+    return frozenset(analyzer_cls._SIGNAL_CATEGORIES.keys() - needed)
+
+
+_ROUTE_CACHE: "OrderedDict[tuple, _FrozenDict]" = OrderedDict()
+_ROUTE_CACHE_MAX = 4096
+
+
 def auto_route_provider(query: str, config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Intelligently route query to the best provider.
     Returns detailed routing decision with confidence.
+    
+    Decisions are memoized on the query plus the only config inputs routing
+    reads (available providers and the auto_routing section); each call gets
+    a fresh copy.
     """
-    analyzer = QueryAnalyzer(config)
-    return analyzer.route(query)
+    auto_config = config.get("auto_routing", DEFAULT_CONFIG["auto_routing"])
+    key = (query, get_available_providers(config), repr(auto_config))
+    frozen = _ROUTE_CACHE.get(key)
+    if frozen is None:
+        frozen = _ROUTE_CACHE[key] = _freeze(QueryAnalyzer(config).route(query))
+        if len(_ROUTE_CACHE) > _ROUTE_CACHE_MAX:
+            _ROUTE_CACHE.popitem(last=False)
+    else:
+        _ROUTE_CACHE.move_to_end(key)
+    return _thaw(frozen)
+
+
+_CJK_UNIFIED_RE = re.compile('[\u4e00-\u9fff]')
+
+
+@lru_cache(maxsize=4096)
+def _detect_lang(q: str) -> Tuple[str, str]:
+    """Detect if query is Chinese or English, return (country, language)."""
+    cn_chars = len(_CJK_UNIFIED_RE.findall(q))
+    ratio = cn_chars / max(len(q) - q.count(' '), 1)  # non-space length, without copying q
+    if ratio > 0.3:
+        return ("cn", "zh-cn")
+    return ("us", "en")
 
 
 def explain_routing(query: str, config: Dict[str, Any]) -> Dict[str, Any]:
@@ -1282,7 +2274,9 @@ def explain_routing(query: str, config: Dict[str, Any]) -> Dict[str, Any]:
     """
     analyzer = QueryAnalyzer(config)
     analysis = analyzer.analyze(query)
-    routing = analyzer.route(query)
+    routing = analyzer.route(query, explain=True)
+    matches = analysis["provider_matches"]
+    complexity = analysis["complexity"]
     
     return {
         "query": query,
@@ -1295,35 +2289,31 @@ def explain_routing(query: str, config: Dict[str, Any]) -> Dict[str, Any]:
         "scores": routing["scores"],
         "top_signals": routing["top_signals"],
         "intent_breakdown": {
-            "shopping_signals": len(analysis["provider_matches"]["serper"]),
-            "research_signals": len(analysis["provider_matches"]["tavily"]),
-            "discovery_signals": len(analysis["provider_matches"]["exa"]),
-            "rag_signals": len(analysis["provider_matches"]["you"]),
-            "github_signals": len(analysis["provider_matches"].get("github", [])),
-            "reddit_signals": len(analysis["provider_matches"].get("reddit", [])),
-            "twitter_signals": len(analysis["provider_matches"].get("twitter", [])),
-            "linuxdo_signals": len(analysis["provider_matches"].get("linuxdo", [])),
+            "shopping_signals": len(matches.get("serper", ())),
+            "research_signals": len(matches.get("tavily", ())),
+            "discovery_signals": len(matches.get("exa", ())),
+            "rag_signals": len(matches.get("you", ())),
+            "github_signals": len(matches.get("github", ())),
+            "reddit_signals": len(matches.get("reddit", ())),
+            "twitter_signals": len(matches.get("twitter", ())),
+            "linuxdo_signals": len(matches.get("linuxdo", ())),
         },
         "query_analysis": {
-            "word_count": analysis["complexity"]["word_count"],
-            "is_complex": analysis["complexity"]["is_complex"],
-            "complexity_score": round(analysis["complexity"]["complexity_score"], 2),
+            "word_count": complexity["word_count"],
+            "is_complex": complexity["is_complex"],
+            "complexity_score": round(complexity["complexity_score"], 2),
             "has_url": analysis["detected_url"],
             "recency_focused": analysis["recency_focused"],
         },
         "all_matches": {
             provider: [
                 {"matched": m["matched"], "weight": m["weight"]}
-                for m in matches
+                for m in provider_matches
             ]
-            for provider, matches in analysis["provider_matches"].items()
-            if matches
+            for provider, provider_matches in matches.items()
+            if provider_matches
         },
-        "available_providers": [
-            p for p in ["serper", "tavily", "exa", "you", "searxng", "github", "reddit", "twitter", "linuxdo"]
-            if (p in ("github", "reddit", "twitter", "linuxdo") or get_api_key(p, config))
-            and p not in config.get("auto_routing", {}).get("disabled_providers", [])
-        ]
+        "available_providers": list(get_available_providers(config)),
     }
 
 
@@ -1331,41 +2321,427 @@ def explain_routing(query: str, config: Dict[str, Any]) -> Dict[str, Any]:
 # HTTP Client
 # =============================================================================
 
-def make_request(url: str, headers: dict, body: dict, timeout: int = 30) -> dict:
-    """Make HTTP POST request and return JSON response."""
+_HTTP_SESSION = None  # shared requests.Session, created on first use
+_HTTP_SESSION_LOCK = threading.Lock()
+_HTTP2_CLIENT = None  # shared httpx.Client, or False when HTTP/2 support is missing
+HTTP2_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Process-level response cache in front of the API calls:
+# sha256 key -> (expiry timestamp, JSON bytes)
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+_RESPONSE_CACHE_MAX = 1024
+DEFAULT_RESPONSE_TTL = 600  # 10 minutes
+_AUTH_HEADERS = ("x-api-key", "authorization")
+_INFLIGHT: Dict[str, Future] = {}  # key -> pending result of the call doing the fetch
+
+
+def cached_request(ttl: int = DEFAULT_RESPONSE_TTL):
+    """
+    Decorator for request functions taking (url, headers, ...): identical
+    requests within ttl seconds are answered from an in-process LRU instead
+    of the network.
+    
+    The key is a SHA-256 over the function, URL, remaining arguments (JSON
+    with sorted keys) and the auth headers, so different API keys never share
+    entries. Each hit returns a freshly decoded copy. Concurrent identical
+    calls are coalesced: only the first goes to the network and the others
+    wait for its result (or its exception). Pass _skip_cache=True to force a
+    network call (its response still refreshes the cache).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(url: str, headers: dict, *args, _skip_cache: bool = False, **kwargs):
+            auth = {k.lower(): v for k, v in headers.items() if k.lower() in _AUTH_HEADERS}
+            key = hashlib.sha256(
+                json.dumps([func.__name__, url, auth, args, kwargs], sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+            now = time.time()
+            pending = None
+            if not _skip_cache:
+                with _RESPONSE_CACHE_LOCK:
+                    entry = _RESPONSE_CACHE.get(key)
+                    if entry is not None and entry[0] > now:
+                        _RESPONSE_CACHE.move_to_end(key)
+                        return _loads(entry[1])
+                    leader = _INFLIGHT.get(key)
+                    if leader is None:
+                        pending = _INFLIGHT[key] = Future()
+                if leader is not None:
+                    return _loads(leader.result())
+            try:
+                result = func(url, headers, *args, **kwargs)
+                payload = _dumpb(result)
+            except BaseException as e:
+                # Also on SystemExit/KeyboardInterrupt or an unserializable
+                # result: a waiter on a never-resolved entry would block forever
+                if pending is not None:
+                    with _RESPONSE_CACHE_LOCK:
+                        del _INFLIGHT[key]
+                    pending.set_exception(e)
+                raise
+            with _RESPONSE_CACHE_LOCK:
+                _RESPONSE_CACHE[key] = (now + ttl, payload)
+                _RESPONSE_CACHE.move_to_end(key)
+                if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAX:
+                    _RESPONSE_CACHE.popitem(last=False)
+                if pending is not None:
+                    del _INFLIGHT[key]
+            if pending is not None:
+                pending.set_result(payload)
+            return result
+        return wrapper
+    return decorator
+
+
+def _http_session():
+    """
+    The process-wide keep-alive session (requires requests), shared by every
+    provider so fallbacks and repeat calls to a host reuse its connections.
+    Transient 429/502/503/504 answers are retried twice with short backoff;
+    the search POSTs are read-only, so retrying them is safe.
+    """
+    global _HTTP_SESSION
+    if _HTTP_SESSION is not None:
+        return _HTTP_SESSION
+    with _HTTP_SESSION_LOCK:
+        if _HTTP_SESSION is not None:
+            return _HTTP_SESSION
+        from urllib3.util.retry import Retry  # ships with requests
+        
+        session = requests.Session()
+        retries = Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=128, max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+
+def _http2_client():
+    """
+    The process-wide HTTP/2 client (requires httpx and h2), or None. Calls to
+    the same API host, such as the hedged fallback attempts or the
+    gather_requests fan-out, then share one multiplexed connection instead of
+    opening one each. Hosts without HTTP/2 are spoken to over HTTP/1.1.
+    """
+    global _HTTP2_CLIENT
+    if _HTTP2_CLIENT is None:
+        with _HTTP_SESSION_LOCK:
+            if _HTTP2_CLIENT is None:
+                client = False
+                if httpx:
+                    try:
+                        client = httpx.Client(
+                            http2=True,
+                            follow_redirects=True,  # as urlopen and requests do
+                            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60.0),
+                        )
+                    except ImportError:
+                        pass  # httpx without the h2 extra
+                _HTTP2_CLIENT = client
+    return _HTTP2_CLIENT or None
+
+
+def _http2_read(client, req: Request, timeout: int) -> bytes:
+    """
+    _urlopen_read() over the HTTP/2 client. Transient 429/502/503/504 answers
+    are retried twice with short backoff, as the requests session does.
+    """
+    for attempt in range(3):
+        try:
+            response = client.request(
+                req.get_method(),
+                req.full_url,
+                content=req.data,
+                headers=dict(req.header_items()),
+                timeout=timeout,
+            )
+        except httpx.TimeoutException as e:
+            raise TimeoutError(str(e))
+        except httpx.HTTPError as e:
+            raise URLError(e)
+        if response.status_code not in HTTP2_RETRY_STATUSES or attempt == 2:
+            break
+        time.sleep(0.2 * 2 ** attempt)
+    if response.status_code >= 400:
+        raise HTTPError(
+            req.full_url, response.status_code, response.reason_phrase, response.headers, io.BytesIO(response.content)
+        )
+    return response.content
+
+
+# API hosts that don't depend on configuration, for prewarm_connection()
+_PROVIDER_ORIGINS = {
+    "serper": "https://google.serper.dev",
+    "tavily": "https://api.tavily.com",
+    "exa": "https://api.exa.ai",
+    "you": "https://ydc-index.io",
+    "github": "https://api.github.com",
+    "reddit": "https://www.reddit.com",
+}
+
+
+def prewarm_connection(provider: str) -> None:
+    """
+    Open a keep-alive connection to the provider's API host in the background,
+    so the TCP/TLS handshake overlaps the fill-lock wait instead of delaying the
+    first search request. Only called after a cache miss. The HEAD on the bare origin carries no
+    credentials and is not a search. No-op without httpx or requests, or for
+    providers whose host is configurable.
+    """
+    origin = _PROVIDER_ORIGINS.get(provider)
+    if origin is None:
+        return
+    
+    def run():
+        # The HTTP libraries are imported here, off the main thread
+        try:
+            client = _http2_client()
+            if client is not None:
+                client.head(origin, timeout=5)
+            elif requests:
+                _http_session().head(origin, timeout=5, allow_redirects=False)
+        except Exception:
+            pass
+    
+    threading.Thread(target=run, daemon=True).start()
+
+
+_ACCEPT_ENCODING = "gzip, br" if brotli is not None else "gzip"
+
+
+def _decompress(raw: bytes, content_encoding: Optional[str]) -> bytes:
+    """Undo a gzip/br Content-Encoding; anything else is returned as is."""
+    encoding = (content_encoding or "").strip().lower()
+    if encoding == "gzip":
+        return gzip.decompress(raw)
+    if encoding == "br" and brotli is not None:
+        return brotli.decompress(raw)
+    return raw
+
+
+def _urlopen_read(req: Request, timeout: int) -> bytes:
+    """
+    Equivalent of urlopen(req, timeout).read() that reuses pooled keep-alive
+    connections when httpx (HTTP/2) or requests is installed, so repeated
+    calls to the same API skip the TCP/TLS handshake. Failures are raised as
+    the same HTTPError / URLError / TimeoutError urlopen would raise.
+    
+    Responses are requested compressed and returned decompressed: httpx and
+    requests handle that themselves, the urlopen fallback sends
+    Accept-Encoding and decodes gzip (and br, with brotli installed) here.
+    """
+    client = _http2_client()
+    if client is not None:
+        return _http2_read(client, req, timeout)
+    if not requests:
+        if not req.has_header("Accept-encoding"):
+            req.add_header("Accept-Encoding", _ACCEPT_ENCODING)
+        try:
+            with urlopen(req, timeout=timeout) as response:
+                return _decompress(response.read(), response.headers.get("Content-Encoding"))
+        except HTTPError as e:
+            encoding = e.headers.get("Content-Encoding") if e.headers else None
+            if not encoding or not e.fp:
+                raise
+            body = _decompress(e.read(), encoding)
+            raise HTTPError(e.url, e.code, e.reason, e.headers, io.BytesIO(body))
+    try:
+        response = _http_session().request(
+            req.get_method(),
+            req.full_url,
+            data=req.data,
+            headers=dict(req.header_items()),
+            timeout=timeout,
+        )
+    except requests.Timeout as e:
+        raise TimeoutError(str(e))
+    except requests.RequestException as e:
+        raise URLError(e)
+    if response.status_code >= 400:
+        raise HTTPError(
+            req.full_url, response.status_code, response.reason, response.headers, io.BytesIO(response.content)
+        )
+    return response.content
+
+
+STREAM_PARSE_MIN_BYTES = 64 * 1024  # smaller bodies are cheaper to decode whole
+
+
+def _load_json_fields(raw: bytes, fields: Sequence[str]) -> dict:
+    """
+    Decode a JSON object response, keeping only the given top-level fields.
+    
+    Large bodies (livecrawl markdown, SearXNG multi-engine aggregates) are
+    walked with ijson when it is installed, so objects under the other keys
+    are never built. Anything smaller, or without ijson, is decoded whole.
+    """
+    if ijson is None or len(raw) < STREAM_PARSE_MIN_BYTES:
+        return _loads(raw)
+    
+    data = {}
+    builder = None
+    for prefix, event, value in ijson.parse(io.BytesIO(raw), use_float=True):
+        if builder is not None:
+            if prefix == current or prefix.startswith(current_dot):
+                builder.event(event, value)
+                continue
+            data[current] = builder.value
+            builder = None
+        if event == "map_key" and prefix == "" and value in fields:
+            current, current_dot = value, value + "."
+            builder = ijson.ObjectBuilder()
+    return data
+
+
+@cached_request()
+def make_request(url: str, headers: dict, body: Any, timeout: int = 30) -> dict:
+    """Make HTTP POST request and return JSON response (body: dict, or pre-encoded JSON bytes)."""
     # Ensure User-Agent is set (required by some APIs like Exa/Cloudflare)
     if "User-Agent" not in headers:
         headers["User-Agent"] = "ClawdBot-WebSearchPlus/2.1"
-    data = json.dumps(body).encode("utf-8")
+    data = body if isinstance(body, bytes) else _dumpb(body)
     req = Request(url, data=data, headers=headers, method="POST")
     
     try:
-        with urlopen(req, timeout=timeout) as response:
-            return json.loads(response.read().decode("utf-8"))
+        return _loads(_urlopen_read(req, timeout))
     except HTTPError as e:
         error_body = e.read().decode("utf-8") if e.fp else str(e)
-        try:
-            error_json = json.loads(error_body)
-            error_detail = error_json.get("error") or error_json.get("message") or error_body
-        except json.JSONDecodeError:
-            error_detail = error_body[:500]
-        
-        error_messages = {
-            401: "Invalid or expired API key. Please check your credentials.",
-            403: "Access forbidden. Your API key may not have permission for this operation.",
-            429: "Rate limit exceeded. Please wait a moment and try again.",
-            500: "Server error. The search provider is experiencing issues.",
-            503: "Service unavailable. The search provider may be down."
-        }
-        
-        friendly_msg = error_messages.get(e.code, f"API error: {error_detail}")
-        raise Exception(f"{friendly_msg} (HTTP {e.code})")
+        raise _api_error(e.code, error_body)
     except URLError as e:
         raise Exception(f"Network error: {e.reason}. Check your internet connection.")
     except TimeoutError:
         raise Exception(f"Request timed out after {timeout}s. Try again or reduce max_results.")
 
 
+def _api_error(status: int, error_body: str) -> Exception:
+    """Turn an HTTP error response from a search API into a friendly exception."""
+    try:
+        error_json = json.loads(error_body)
+        error_detail = error_json.get("error") or error_json.get("message") or error_body
+    except json.JSONDecodeError:
+        error_detail = error_body[:500]
+    
+    error_messages = {
+        401: "Invalid or expired API key. Please check your credentials.",
+        403: "Access forbidden. Your API key may not have permission for this operation.",
+        429: "Rate limit exceeded. Please wait a moment and try again.",
+        500: "Server error. The search provider is experiencing issues.",
+        503: "Service unavailable. The search provider may be down."
+    }
+    
+    friendly_msg = error_messages.get(status, f"API error: {error_detail}")
+    return Exception(f"{friendly_msg} (HTTP {status})")
+
+
+def gather_requests(calls: List[Tuple[str, dict, dict]], timeout: int = 30) -> List[Any]:
+    """
+    Make several independent POST requests concurrently.
+    
+    Args:
+        calls: (url, headers, body) per request, as for make_request
+        timeout: Per-request timeout in seconds
+    
+    Returns:
+        One entry per call, in order: the JSON response, or the Exception
+        make_request would have raised for it.
+    
+    With aiohttp installed (and no HTTP/2 client, see _http2_client()) the
+    requests share one session and event loop; otherwise, or when called from
+    inside a running event loop, each runs through make_request on its own
+    worker thread. Either way the wait is the
+    slowest request rather than the sum of all.
+    """
+    if len(calls) < 2:
+        return [_call_or_error(make_request, *call, timeout) for call in calls]
+    
+    # aiohttp speaks HTTP/1.1 only; with HTTP/2 the threads share connections instead
+    use_async = bool(aiohttp) and _http2_client() is None
+    if use_async:
+        try:
+            asyncio.get_running_loop()
+            use_async = False  # asyncio.run() can't nest
+        except RuntimeError:
+            pass
+    if use_async:
+        if uvloop and hasattr(uvloop, "run"):  # uvloop.run() needs uvloop >= 0.18
+            return uvloop.run(_gather_requests(calls, timeout))
+        return asyncio.run(_gather_requests(calls, timeout))
+    
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = [pool.submit(_call_or_error, make_request, *call, timeout) for call in calls]
+        return [f.result() for f in futures]
+
+
+def _call_or_error(func: Callable, *args: Any) -> Any:
+    """Return func(*args), or the exception it raised."""
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
+
+
+ASYNC_MAX_CONNECTIONS = 256
+ASYNC_MAX_PER_HOST = 64  # further requests to a host queue for a free connection
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF = 0.5  # seconds before the first retry, doubled each time
+
+
+async def _gather_requests(calls: List[Tuple[str, dict, dict]], timeout: int) -> List[Any]:
+    """Run the calls of gather_requests on one aiohttp session."""
+    connector = aiohttp.TCPConnector(limit=ASYNC_MAX_CONNECTIONS, limit_per_host=ASYNC_MAX_PER_HOST)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(
+            *(_async_make_request(session, url, headers, body, timeout) for url, headers, body in calls),
+            return_exceptions=True,
+        )
+
+
+async def _async_make_request(session: Any, url: str, headers: dict, body: Any, timeout: int = 30) -> dict:
+    """
+    aiohttp counterpart of make_request, raising the same errors.
+    
+    HTTP 429 responses are retried up to RATE_LIMIT_RETRIES times with
+    exponential backoff plus jitter (or the server's numeric Retry-After),
+    so a burst of concurrent calls backs off instead of failing at once.
+    """
+    if "User-Agent" not in headers:
+        headers["User-Agent"] = "ClawdBot-WebSearchPlus/2.1"
+    data = body if isinstance(body, bytes) else _dumpb(body)
+    
+    try:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            async with session.post(
+                url, data=data, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                raw = await response.read()
+                if response.status == 429 and attempt < RATE_LIMIT_RETRIES:
+                    retry_after = response.headers.get("Retry-After", "")
+                    delay = float(retry_after) if retry_after.isdigit() else RATE_LIMIT_BACKOFF * 2 ** attempt
+                    await asyncio.sleep(delay + random.uniform(0, delay / 2))
+                    continue
+                if response.status >= 400:
+                    raise _api_error(response.status, raw.decode("utf-8", errors="replace"))
+                return _loads(raw)
+    except asyncio.TimeoutError:
+        raise Exception(f"Request timed out after {timeout}s. Try again or reduce max_results.")
+    except aiohttp.ClientError as e:
+        raise Exception(f"Network error: {e}. Check your internet connection.")
+
+
+@lru_cache(maxsize=None)
+def rank_scores(count: int, step: float, ndigits: int) -> Tuple[float, ...]:
+    """Descending position scores round(1.0 - i * step, ndigits) for i < count."""
+    return tuple(round(1.0 - i * step, ndigits) for i in range(count))
+
+
 # =============================================================================
 # Serper (Google Search API)
 # =============================================================================
@@ -1407,39 +2783,40 @@ def search_serper(
         "Content-Type": "application/json",
     }
     
-    data = make_request(endpoint, headers, body)
+    if include_images:
+        # The image search doesn't depend on the organic one: issue both at once
+        data, img_data = gather_requests([
+            (endpoint, headers, body),
+            ("https://google.serper.dev/images", dict(headers), {"q": query, "gl": country, "hl": language, "num": 5}),
+        ])
+        if isinstance(data, Exception):
+            raise data
+    else:
+        data = make_request(endpoint, headers, body)
     
     results = []
-    for i, item in enumerate(data.get("organic", [])[:max_results]):
+    organic = data.get("organic", [])[:max_results]
+    for item, score in zip(organic, rank_scores(len(organic), 0.1, 2)):
         results.append({
             "title": item.get("title", ""),
             "url": item.get("link", ""),
             "snippet": item.get("snippet", ""),
-            "score": round(1.0 - i * 0.1, 2),
+            "score": score,
             "date": item.get("date"),
         })
     
-    answer = ""
-    if data.get("answerBox", {}).get("answer"):
-        answer = data["answerBox"]["answer"]
-    elif data.get("answerBox", {}).get("snippet"):
-        answer = data["answerBox"]["snippet"]
-    elif data.get("knowledgeGraph", {}).get("description"):
-        answer = data["knowledgeGraph"]["description"]
-    elif results:
-        answer = results[0]["snippet"]
+    # First non-empty of: answer box, its snippet, knowledge graph, top result
+    answer_box = data.get("answerBox") or {}
+    answer = next((v for v in (
+        answer_box.get("answer"),
+        answer_box.get("snippet"),
+        (data.get("knowledgeGraph") or {}).get("description"),
+        results[0]["snippet"] if results else None,
+    ) if v), "")
     
     images = []
-    if include_images:
-        try:
-            img_data = make_request(
-                "https://google.serper.dev/images",
-                headers,
-                {"q": query, "gl": country, "hl": language, "num": 5},
-            )
-            images = [img.get("imageUrl", "") for img in img_data.get("images", [])[:5] if img.get("imageUrl")]
-        except Exception:
-            pass
+    if include_images and not isinstance(img_data, Exception):
+        images = [img.get("imageUrl", "") for img in img_data.get("images", [])[:5] if img.get("imageUrl")]
     
     return {
         "provider": "serper",
@@ -1456,6 +2833,12 @@ def search_serper(
 # Tavily (Research Search)
 # =============================================================================
 
+_TAVILY_BODY_TEMPLATE = (
+    b'{"api_key":%s,"query":%s,"max_results":%d,"search_depth":%s,"topic":%s,'
+    b'"include_images":%s,"include_answer":true,"include_raw_content":%s}'
+)
+_JSON_BOOL = {True: b"true", False: b"false"}
+
 def search_tavily(
     query: str,
     api_key: str,
@@ -1470,21 +2853,27 @@ def search_tavily(
     """Search using Tavily (AI Research Search)."""
     endpoint = "https://api.tavily.com/search"
     
-    body = {
-        "api_key": api_key,
-        "query": query,
-        "max_results": max_results,
-        "search_depth": depth,
-        "topic": topic,
-        "include_images": include_images,
-        "include_answer": True,
-        "include_raw_content": include_raw_content,
-    }
-    
-    if include_domains:
-        body["include_domains"] = include_domains
-    if exclude_domains:
-        body["exclude_domains"] = exclude_domains
+    if include_domains or exclude_domains:
+        body = {
+            "api_key": api_key,
+            "query": query,
+            "max_results": max_results,
+            "search_depth": depth,
+            "topic": topic,
+            "include_images": include_images,
+            "include_answer": True,
+            "include_raw_content": include_raw_content,
+        }
+        if include_domains:
+            body["include_domains"] = include_domains
+        if exclude_domains:
+            body["exclude_domains"] = exclude_domains
+    else:
+        # Common shape: fill the pre-encoded template instead of serializing a dict
+        body = _TAVILY_BODY_TEMPLATE % (
+            _dumpb(api_key), _dumpb(query), int(max_results), _dumpb(depth), _dumpb(topic),
+            _JSON_BOOL[bool(include_images)], _JSON_BOOL[bool(include_raw_content)],
+        )
     
     headers = {"Content-Type": "application/json"}
     
@@ -1647,8 +3036,7 @@ def search_you(
         params["livecrawl_formats"] = "markdown"
     
     # Build URL with query params (URL-encode values)
-    query_string = "&".join(f"{k}={quote(str(v))}" for k, v in params.items())
-    url = f"{endpoint}?{query_string}"
+    url = f"{endpoint}?{urlencode(params, quote_via=quote)}"
     
     headers = {
         "X-API-KEY": api_key,
@@ -1657,12 +3045,10 @@ def search_you(
     }
     
     # Make GET request (You.com uses GET, not POST)
-    from urllib.request import Request, urlopen
     req = Request(url, headers=headers, method="GET")
     
     try:
-        with urlopen(req, timeout=30) as response:
-            data = json.loads(response.read().decode("utf-8"))
+        data = _load_json_fields(_urlopen_read(req, 30), ("results", "metadata"))
     except HTTPError as e:
         error_body = e.read().decode("utf-8") if e.fp else str(e)
         try:
@@ -1689,7 +3075,8 @@ def search_you(
     
     # Normalize web results
     results = []
-    for i, item in enumerate(web_results[:max_results]):
+    web_results = web_results[:max_results]
+    for item, score in zip(web_results, rank_scores(len(web_results), 0.05, 3)):
         snippets = item.get("snippets", [])
         snippet = snippets[0] if snippets else item.get("description", "")
         
@@ -1697,7 +3084,7 @@ def search_you(
             "title": item.get("title", ""),
             "url": item.get("url", ""),
             "snippet": snippet,
-            "score": round(1.0 - i * 0.05, 3),  # Assign descending score
+            "score": score,  # Assign descending score
             "date": item.get("page_age"),
             "source": "web",
         }
@@ -1807,8 +3194,7 @@ def search_searxng(
     
     # Build URL
     base_url = instance_url.rstrip("/")
-    query_string = "&".join(f"{k}={quote(str(v))}" for k, v in params.items())
-    url = f"{base_url}/search?{query_string}"
+    url = f"{base_url}/search?{urlencode(params, quote_via=quote)}"
     
     headers = {
         "User-Agent": "ClawdBot-WebSearchPlus/2.5",
@@ -1819,8 +3205,10 @@ def search_searxng(
     req = Request(url, headers=headers, method="GET")
     
     try:
-        with urlopen(req, timeout=30) as response:
-            data = json.loads(response.read().decode("utf-8"))
+        data = _load_json_fields(
+            _urlopen_read(req, 30),
+            ("results", "answers", "infoboxes", "suggestions", "corrections", "number_of_results"),
+        )
     except HTTPError as e:
         error_body = e.read().decode("utf-8") if e.fp else str(e)
         try:
@@ -1892,14 +3280,14 @@ def search_searxng(
 # GitHub Search (Public API — no key required, optional GITHUB_TOKEN for rate limit)
 # =============================================================================
 
+@cached_request()
 def _make_get_request(url: str, headers: dict, timeout: int = 30) -> dict:
     """Make HTTP GET request and return JSON response."""
     if "User-Agent" not in headers:
         headers["User-Agent"] = "ClawdBot-WebSearchPlus/2.7"
     req = Request(url, headers=headers, method="GET")
     try:
-        with urlopen(req, timeout=timeout) as response:
-            return json.loads(response.read().decode("utf-8"))
+        return _loads(_urlopen_read(req, timeout))
     except HTTPError as e:
         error_body = e.read().decode("utf-8") if e.fp else str(e)
         raise Exception(f"GitHub API error (HTTP {e.code}): {error_body[:300]}")
@@ -1939,12 +3327,15 @@ def search_github(
     data = _make_get_request(url, headers)
 
     results = []
-    for item in data.get("items", [])[:max_results]:
+    items = data.get("items", [])[:max_results]
+    # Scores are relative to the top result's stars
+    top_stars = max(1, items[0].get("stargazers_count", 1)) if items else 1
+    for item in items:
         results.append({
             "title": item.get("full_name", ""),
             "url": item.get("html_url", ""),
             "snippet": item.get("description") or "",
-            "score": round(item.get("stargazers_count", 0) / max(1, data.get("items", [{}])[0].get("stargazers_count", 1)), 3),
+            "score": round(item.get("stargazers_count", 0) / top_stars, 3),
             "stars": item.get("stargazers_count", 0),
             "forks": item.get("forks_count", 0),
             "language": item.get("language"),
@@ -2199,11 +3590,109 @@ def _linuxdo_via_exa(query: str, max_results: int, config: dict) -> dict:
     return result
 
 
+# =============================================================================
+# Provider Fallback
+# =============================================================================
+
+def search_with_fallback(
+    providers: Sequence[str],
+    search_fn: Callable[[str], Dict[str, Any]],
+    hedge_after: Optional[float] = DEFAULT_HEDGE_AFTER,
+    on_error: Optional[Callable[[str, Exception, Optional[str]], None]] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], List[Dict[str, str]]]:
+    """
+    Run search_fn over providers in order until one succeeds.
+    
+    A failure starts the next provider right away. If the provider in flight
+    hasn't answered after hedge_after seconds, the next one is started
+    alongside it and whichever succeeds first wins, so a hanging provider
+    costs at most hedge_after instead of its full timeout. At most two
+    providers run at once; a falsy hedge_after (the default) keeps it strictly
+    sequential. Hedging can bill two providers for one query, so it is opt-in.
+    Anything search_fn raises that is not an Exception (e.g. the SystemExit
+    from API key validation) is re-raised here, in the calling thread.
+    
+    Args:
+        providers: Providers in order of preference
+        search_fn: Runs the search for one provider, raising on failure
+        hedge_after: Seconds to wait before racing the next provider
+        on_error: Called with (provider, exception, next provider or None)
+    
+    Returns:
+        (result, provider that produced it, [{"provider", "error"}] of the
+        failures), with result and provider None if all failed. When hedging,
+        a provider that was outrun rather than failed is not in the failures,
+        so the winner can differ from providers[0] with that list empty.
+    """
+    outcomes = queue.Queue()
+    remaining = list(providers)
+    errors = []
+    in_flight = []
+    
+    def start() -> None:
+        prov = remaining.pop(0)
+        in_flight.append(prov)
+        
+        def run() -> None:
+            try:
+                outcomes.put((prov, search_fn(prov), None))
+            except BaseException as e:
+                # SystemExit (key validation) etc. are re-raised by the caller
+                outcomes.put((prov, None, e))
+        
+        # Daemon threads: a losing provider must not hold up process exit
+        threading.Thread(target=run, daemon=True).start()
+    
+    if remaining:
+        start()
+    while in_flight:
+        can_hedge = hedge_after and remaining and len(in_flight) < 2
+        try:
+            prov, result, error = outcomes.get(timeout=hedge_after if can_hedge else None)
+        except queue.Empty:
+            start()
+            continue
+        in_flight.remove(prov)
+        if error is None:
+            return result, prov, errors
+        if not isinstance(error, Exception):
+            raise error
+        errors.append({"provider": prov, "error": str(error)})
+        if remaining and len(in_flight) < 2:
+            start()
+        if on_error:
+            on_error(prov, error, in_flight[-1] if in_flight else None)
+    return None, None, errors
+
+
 # =============================================================================
 # CLI
 # =============================================================================
 
-def main():
+# Allowed values of the CLI options, built once at import
+PROVIDER_CHOICES = ALL_PROVIDERS + ("auto",)
+SERPER_TYPE_CHOICES = ("search", "news", "images", "videos", "places", "shopping")
+TIME_RANGE_CHOICES = ("hour", "day", "week", "month", "year")
+TAVILY_DEPTH_CHOICES = ("basic", "advanced")
+TAVILY_TOPIC_CHOICES = ("general", "news")
+EXA_TYPE_CHOICES = ("neural", "keyword")
+EXA_CATEGORY_CHOICES = (
+    "company", "research paper", "news", "pdf", "github",
+    "tweet", "personal site", "linkedin profile",
+)
+YOU_SAFESEARCH_CHOICES = ("off", "moderate", "strict")
+FRESHNESS_CHOICES = ("day", "week", "month", "year")
+LIVECRAWL_CHOICES = ("web", "news", "all")
+SEARXNG_SAFESEARCH_CHOICES = (0, 1, 2)
+GITHUB_SORT_CHOICES = ("stars", "forks", "updated", "help-wanted-issues")
+REDDIT_SORT_CHOICES = ("relevance", "hot", "top", "new", "comments")
+REDDIT_TIME_CHOICES = ("hour", "day", "week", "month", "year", "all")
+TWITTER_METHOD_CHOICES = ("serper", "exa")
+
+
+@lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser once per process; defaults come from the loaded config."""
     config = load_config()
     
     parser = argparse.ArgumentParser(
@@ -2243,7 +3732,7 @@ Full docs: See README.md and SKILL.md
     # Common arguments
     parser.add_argument(
         "--provider", "-p", 
-        choices=["serper", "tavily", "exa", "you", "searxng", "github", "reddit", "twitter", "linuxdo", "auto"],
+        choices=PROVIDER_CHOICES,
         help="Search provider (auto=intelligent routing)"
     )
     parser.add_argument(
@@ -2282,11 +3771,11 @@ Full docs: See README.md and SKILL.md
         "--type", 
         dest="search_type", 
         default=serper_config.get("type", "search"),
-        choices=["search", "news", "images", "videos", "places", "shopping"]
+        choices=SERPER_TYPE_CHOICES
     )
     parser.add_argument(
         "--time-range", 
-        choices=["hour", "day", "week", "month", "year"]
+        choices=TIME_RANGE_CHOICES
     )
     
     # Tavily-specific
@@ -2294,12 +3783,12 @@ Full docs: See README.md and SKILL.md
     parser.add_argument(
         "--depth", 
         default=tavily_config.get("depth", "basic"), 
-        choices=["basic", "advanced"]
+        choices=TAVILY_DEPTH_CHOICES
     )
     parser.add_argument(
         "--topic", 
         default=tavily_config.get("topic", "general"), 
-        choices=["general", "news"]
+        choices=TAVILY_TOPIC_CHOICES
     )
     parser.add_argument("--raw-content", action="store_true")
     
@@ -2308,14 +3797,11 @@ Full docs: See README.md and SKILL.md
     parser.add_argument(
         "--exa-type", 
         default=exa_config.get("type", "neural"), 
-        choices=["neural", "keyword"]
+        choices=EXA_TYPE_CHOICES
     )
     parser.add_argument(
         "--category",
-        choices=[
-            "company", "research paper", "news", "pdf", "github", 
-            "tweet", "personal site", "linkedin profile"
-        ]
+        choices=EXA_CATEGORY_CHOICES
     )
     parser.add_argument("--start-date")
     parser.add_argument("--end-date")
@@ -2326,17 +3812,17 @@ Full docs: See README.md and SKILL.md
     parser.add_argument(
         "--you-safesearch",
         default=you_config.get("safesearch", "moderate"),
-        choices=["off", "moderate", "strict"],
+        choices=YOU_SAFESEARCH_CHOICES,
         help="You.com SafeSearch filter"
     )
     parser.add_argument(
         "--freshness",
-        choices=["day", "week", "month", "year"],
+        choices=FRESHNESS_CHOICES,
         help="Filter results by recency (You.com/Serper)"
     )
     parser.add_argument(
         "--livecrawl",
-        choices=["web", "news", "all"],
+        choices=LIVECRAWL_CHOICES,
         help="You.com: fetch full page content"
     )
     parser.add_argument(
@@ -2357,7 +3843,7 @@ Full docs: See README.md and SKILL.md
         "--searxng-safesearch",
         type=int,
         default=searxng_config.get("safesearch", 0),
-        choices=[0, 1, 2],
+        choices=SEARXNG_SAFESEARCH_CHOICES,
         help="SearXNG SafeSearch: 0=off, 1=moderate, 2=strict"
     )
     parser.add_argument(
@@ -2376,7 +3862,7 @@ Full docs: See README.md and SKILL.md
     parser.add_argument(
         "--github-sort",
         default="stars",
-        choices=["stars", "forks", "updated", "help-wanted-issues"],
+        choices=GITHUB_SORT_CHOICES,
         help="GitHub: sort repositories by"
     )
     parser.add_argument(
@@ -2396,13 +3882,13 @@ Full docs: See README.md and SKILL.md
     parser.add_argument(
         "--reddit-sort",
         default="relevance",
-        choices=["relevance", "hot", "top", "new", "comments"],
+        choices=REDDIT_SORT_CHOICES,
         help="Reddit: sort results by"
     )
     parser.add_argument(
         "--reddit-time",
         default="week",
-        choices=["hour", "day", "week", "month", "year", "all"],
+        choices=REDDIT_TIME_CHOICES,
         help="Reddit: time filter for results"
     )
 
@@ -2410,7 +3896,7 @@ Full docs: See README.md and SKILL.md
     parser.add_argument(
         "--twitter-method",
         default="serper",
-        choices=["serper", "exa"],
+        choices=TWITTER_METHOD_CHOICES,
         help="Twitter: search method (serper=Google site filter, exa=neural tweet search)"
     )
 
@@ -2449,20 +3935,26 @@ Full docs: See README.md and SKILL.md
         action="store_true",
         help="Show cache statistics and exit"
     )
+    # Internal: set on the detached process that renews a stale cache entry
+    parser.add_argument("--refresh-cache", action="store_true", help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    config = load_config()
+    parser = _build_parser()
     
     args = parser.parse_args()
     
     # Handle cache management commands first (before query validation)
     if args.clear_cache:
         result = cache_clear()
-        indent = None if args.compact else 2
-        print(json.dumps(result, indent=indent, ensure_ascii=False))
+        print(_dumps(result, indent=not args.compact))
         return
     
     if args.cache_stats:
         result = cache_stats()
-        indent = None if args.compact else 2
-        print(json.dumps(result, indent=indent, ensure_ascii=False))
+        print(_dumps(result, indent=not args.compact))
         return
     
     if not args.query and not args.similar_url:
@@ -2473,8 +3965,7 @@ Full docs: See README.md and SKILL.md
         if not args.query:
             parser.error("--query is required for --explain-routing")
         explanation = explain_routing(args.query, config)
-        indent = None if args.compact else 2
-        print(json.dumps(explanation, indent=indent, ensure_ascii=False))
+        print(_dumps(explanation, indent=not args.compact))
         return
     
     # Determine provider
@@ -2490,6 +3981,7 @@ Full docs: See README.md and SKILL.md
                 "reason": routing["reason"],
                 "top_signals": routing["top_signals"],
                 "scores": routing["scores"],
+                "pruned": routing["pruned"],
             }
         else:
             provider = "exa"
@@ -2516,14 +4008,6 @@ Full docs: See README.md and SKILL.md
             providers_to_try.append(p)
     
     # Auto-detect query language, with per-provider override
-    def _detect_lang(q: str) -> tuple:
-        """Detect if query is Chinese or English, return (country, language)."""
-        cn_chars = sum(1 for c in q if '\u4e00' <= c <= '\u9fff')
-        ratio = cn_chars / max(len(q.replace(' ', '')), 1)
-        if ratio > 0.3:
-            return ("cn", "zh-cn")
-        return ("us", "en")
-
     _query_country, _query_language = _detect_lang(args.query)
 
     # Per-provider language strategy:
@@ -2542,156 +4026,190 @@ Full docs: See README.md and SKILL.md
 
     _auto_country, _auto_language = _lang_for(args.provider if args.provider else "serper")
 
+    # Bind every provider's arguments once; the fallback loop only looks them up.
+    # Keyed providers still take their API key (or SearXNG instance URL) per call.
+    _serper_country, _serper_language = _lang_for("serper")
+    _you_country, _you_language = _lang_for("you")
+    search_dispatch: Dict[str, Callable[..., Dict[str, Any]]] = {
+        "serper": partial(
+            search_serper,
+            query=args.query,
+            max_results=args.max_results,
+            country=_serper_country,
+            language=_serper_language,
+            search_type=args.search_type,
+            time_range=args.time_range,
+            include_images=args.images,
+        ),
+        "tavily": partial(
+            search_tavily,
+            query=args.query,
+            max_results=args.max_results,
+            depth=args.depth,
+            topic=args.topic,
+            include_domains=args.include_domains,
+            exclude_domains=args.exclude_domains,
+            include_images=args.images,
+            include_raw_content=args.raw_content,
+        ),
+        "exa": partial(
+            search_exa,
+            query=args.query or "",
+            max_results=args.max_results,
+            search_type=args.exa_type,
+            category=args.category,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            similar_url=args.similar_url,
+            include_domains=args.include_domains,
+            exclude_domains=args.exclude_domains,
+        ),
+        "you": partial(
+            search_you,
+            query=args.query,
+            max_results=args.max_results,
+            country=_you_country.upper(),
+            language=_you_language.split("-")[0],
+            freshness=args.freshness,
+            safesearch=args.you_safesearch,
+            include_news=args.include_news,
+            livecrawl=args.livecrawl,
+        ),
+        "searxng": partial(
+            search_searxng,
+            query=args.query,
+            max_results=args.max_results,
+            categories=args.categories,
+            engines=args.engines,
+            language=_lang_for("searxng")[1].split("-")[0],
+            time_range=args.time_range,
+            safesearch=args.searxng_safesearch,
+        ),
+        "github": partial(
+            search_github,
+            query=args.query,
+            max_results=args.max_results,
+            sort=args.github_sort,
+            language=args.github_language,
+            created_after=args.github_created,
+            config=config,
+        ),
+        "reddit": partial(
+            search_reddit,
+            query=args.query,
+            max_results=args.max_results,
+            subreddit=args.subreddit,
+            sort=args.reddit_sort,
+            time_filter=args.reddit_time,
+            config=config,
+        ),
+        "twitter": partial(
+            search_twitter,
+            query=args.query,
+            max_results=args.max_results,
+            method=args.twitter_method,
+            config=config,
+        ),
+        "linuxdo": partial(
+            search_linuxdo,
+            query=args.query,
+            max_results=args.max_results,
+            category=args.linuxdo_category,
+            config=config,
+        ),
+    }
+
     # Helper function to execute search for a provider
     def execute_search(prov: str) -> Dict[str, Any]:
-        _p_country, _p_language = _lang_for(prov)
+        search_fn = search_dispatch.get(prov)
+        if search_fn is None:
+            raise ValueError(f"Unknown provider: {prov}")
         # Social providers don't need API key validation
-        if prov in ("github", "reddit", "twitter", "linuxdo"):
-            key = None
-        else:
-            key = validate_api_key(prov, config)
-        if prov == "serper":
-            return search_serper(
-                query=args.query,
-                api_key=key,
-                max_results=args.max_results,
-                country=_p_country,
-                language=_p_language,
-                search_type=args.search_type,
-                time_range=args.time_range,
-                include_images=args.images,
-            )
-        elif prov == "tavily":
-            return search_tavily(
-                query=args.query,
-                api_key=key,
-                max_results=args.max_results,
-                depth=args.depth,
-                topic=args.topic,
-                include_domains=args.include_domains,
-                exclude_domains=args.exclude_domains,
-                include_images=args.images,
-                include_raw_content=args.raw_content,
-            )
-        elif prov == "exa":
-            return search_exa(
-                query=args.query or "",
-                api_key=key,
-                max_results=args.max_results,
-                search_type=args.exa_type,
-                category=args.category,
-                start_date=args.start_date,
-                end_date=args.end_date,
-                similar_url=args.similar_url,
-                include_domains=args.include_domains,
-                exclude_domains=args.exclude_domains,
-            )
-        elif prov == "you":
-            return search_you(
-                query=args.query,
-                api_key=key,
-                max_results=args.max_results,
-                country=_p_country.upper(),
-                language=_p_language.split("-")[0],
-                freshness=args.freshness,
-                safesearch=args.you_safesearch,
-                include_news=args.include_news,
-                livecrawl=args.livecrawl,
-            )
-        elif prov == "searxng":
+        if prov in KEYLESS_PROVIDERS:
+            return search_fn()
+        key = validate_api_key(prov, config)
+        if prov == "searxng":
             # For SearXNG, 'key' is actually the instance URL
-            instance_url = args.searxng_url or key
-            return search_searxng(
-                query=args.query,
-                instance_url=instance_url,
-                max_results=args.max_results,
-                categories=args.categories,
-                engines=args.engines,
-                language=_p_language.split("-")[0],
-                time_range=args.time_range,
-                safesearch=args.searxng_safesearch,
-            )
-        elif prov == "github":
-            return search_github(
-                query=args.query,
-                max_results=args.max_results,
-                sort=args.github_sort,
-                language=args.github_language,
-                created_after=args.github_created,
-                config=config,
-            )
-        elif prov == "reddit":
-            return search_reddit(
-                query=args.query,
-                max_results=args.max_results,
-                subreddit=args.subreddit,
-                sort=args.reddit_sort,
-                time_filter=args.reddit_time,
-                config=config,
-            )
-        elif prov == "twitter":
-            return search_twitter(
-                query=args.query,
-                max_results=args.max_results,
-                method=args.twitter_method,
-                config=config,
-            )
-        elif prov == "linuxdo":
-            return search_linuxdo(
-                query=args.query,
-                max_results=args.max_results,
-                category=args.linuxdo_category,
-                config=config,
-            )
-        else:
-            raise ValueError(f"Unknown provider: {prov}")
+            return search_fn(instance_url=args.searxng_url or key)
+        return search_fn(api_key=key)
     
-    # Check cache first (unless --no-cache is set)
+    def _from_cache(entry: Dict[str, Any]) -> Dict[str, Any]:
+        # Remove cache metadata from output but note it was cached
+        cached = {k: v for k, v in entry.items() if not k.startswith("_cache_")}
+        cached["cached"] = True
+        cached["cache_age_seconds"] = int(time.time() - entry.get("_cache_timestamp", 0))
+        return cached
+    
+    # Check cache first (unless --no-cache is set or this is a background refresh)
     cached_result = None
     cache_hit = False
-    if not args.no_cache and args.query:
-        cached_result = cache_get(
+    if not args.no_cache and not args.refresh_cache and args.query:
+        cached_result, cache_stale = cache_get(
             query=args.query,
             provider=provider,
             max_results=args.max_results,
-            ttl=args.cache_ttl
+            ttl=args.cache_ttl,
+            stale_factor=auto_config.get("stale_factor", DEFAULT_STALE_FACTOR),
         )
         if cached_result:
             cache_hit = True
-            # Remove cache metadata from output but note it was cached
-            result = {k: v for k, v in cached_result.items() if not k.startswith("_cache_")}
-            result["cached"] = True
-            result["cache_age_seconds"] = int(time.time() - cached_result.get("_cache_timestamp", 0))
-    
-    # Try providers with fallback on error (if not cached)
-    errors = []
-    successful_provider = None
+            result = _from_cache(cached_result)
+            if cache_stale:
+                # Serve the stale copy now, renew it out of band unless a
+                # refresh (or a fetch) of this entry is already running
+                result["cache_stale"] = True
+                refresh_lock = acquire_fill_lock(args.query, provider, args.max_results, block=False)
+                if refresh_lock is not None:
+                    _spawn_cache_refresh(refresh_lock)
     
     if not cache_hit:
-        result = None
+        # A request is now likely: open the provider's connection while the
+        # fill lock is taken (a cache hit never touches the network)
+        prewarm_connection(provider)
     
-    for current_provider in providers_to_try:
-        if cache_hit:
-            successful_provider = provider
-            break  # Already have cached result
+    # On a miss, let only one of several concurrent runs for this entry hit the provider
+    fill_lock = None
+    if args.refresh_cache and args.query:
+        # The run that spawned this refresh took the lock on our behalf
+        fill_lock = _fill_lock_path(args.query, provider, args.max_results)
+    elif not cache_hit and not args.no_cache and args.query:
+        fill_lock = acquire_fill_lock(args.query, provider, args.max_results)
+        if fill_lock is None:
+            cached_result, _ = cache_get(
+                query=args.query,
+                provider=provider,
+                max_results=args.max_results,
+                ttl=args.cache_ttl,
+            )
+            if cached_result:
+                cache_hit = True
+                result = _from_cache(cached_result)
+    
+    # Try providers with fallback on error (if not cached)
+    def _log_fallback(failed: str, error: Exception, next_provider: Optional[str]) -> None:
+        # Log fallback attempt to stderr
+        if next_provider:
+            print(_dumps({
+                "fallback": True,
+                "failed_provider": failed,
+                "error": str(error),
+                "trying_next": next_provider,
+            }), file=sys.stderr)
+    
+    errors = []
+    if cache_hit:
+        successful_provider = provider
+    else:
         try:
-            result = execute_search(current_provider)
-            successful_provider = current_provider
-            break  # Success! Exit the loop
-        except Exception as e:
-            error_msg = str(e)
-            errors.append({"provider": current_provider, "error": error_msg})
-            # Log fallback attempt to stderr
-            if len(providers_to_try) > 1:
-                remaining = [p for p in providers_to_try if p != current_provider and p not in [err["provider"] for err in errors]]
-                if remaining:
-                    print(json.dumps({
-                        "fallback": True,
-                        "failed_provider": current_provider,
-                        "error": error_msg,
-                        "trying_next": remaining[0] if remaining else None
-                    }), file=sys.stderr)
-            continue  # Try next provider
+            result, successful_provider, errors = search_with_fallback(
+                providers_to_try,
+                execute_search,
+                hedge_after=auto_config.get("hedge_after", DEFAULT_HEDGE_AFTER),
+                on_error=_log_fallback,
+            )
+        except BaseException:
+            release_fill_lock(fill_lock)
+            raise
     
     if result is not None:
         # Update routing info if we fell back to a different provider
@@ -2699,7 +4217,7 @@ Full docs: See README.md and SKILL.md
             routing_info["fallback_used"] = True
             routing_info["original_provider"] = provider
             routing_info["provider"] = successful_provider
-            routing_info["fallback_errors"] = errors[:-1] if errors else []
+            routing_info["fallback_errors"] = errors
         
         result["routing"] = routing_info
         
@@ -2711,6 +4229,7 @@ Full docs: See README.md and SKILL.md
                 max_results=args.max_results,
                 result=result
             )
+        release_fill_lock(fill_lock)
         
         # Add cache indicator to output
         if cache_hit:
@@ -2721,7 +4240,15 @@ Full docs: See README.md and SKILL.md
         # Assess result quality and add fallback hint for AI agents
         results_list = result.get("results", [])
         result_count = len(results_list)
-        non_empty_snippets = sum(1 for r in results_list if len(r.get("snippet", "")) >= 20)
+        # Count useful snippets, stopping once half the results qualify; the
+        # full count is only reported when it falls short of that.
+        snippet_threshold = (result_count + 1) // 2
+        non_empty_snippets = 0
+        for r in results_list:
+            if len(r.get("snippet") or "") >= 20:
+                non_empty_snippets += 1
+                if non_empty_snippets >= snippet_threshold:
+                    break
 
         if result_count == 0:
             result["fallback_hint"] = {
@@ -2736,7 +4263,7 @@ Full docs: See README.md and SKILL.md
                 "result_count": result_count,
                 "suggestion": "Use built-in WebSearch tool to supplement with additional results."
             }
-        elif non_empty_snippets < result_count * 0.5:
+        elif non_empty_snippets < snippet_threshold:
             result["fallback_hint"] = {
                 "should_fallback": True,
                 "reason": "low_quality_snippets",
@@ -2747,8 +4274,7 @@ Full docs: See README.md and SKILL.md
         else:
             result["fallback_hint"] = {"should_fallback": False}
 
-        indent = None if args.compact else 2
-        print(json.dumps(result, indent=indent, ensure_ascii=False))
+        print(_dumps(result, indent=not args.compact))
     else:
         # All providers failed
         error_result = {
@@ -2763,7 +4289,8 @@ Full docs: See README.md and SKILL.md
                 "suggestion": "All search providers failed. Use built-in WebSearch tool as primary search method for this query."
             }
         }
-        print(json.dumps(error_result, indent=2), file=sys.stderr)
+        release_fill_lock(fill_lock)
+        print(_dumps(error_result, indent=True), file=sys.stderr)
         sys.exit(1)
 
 
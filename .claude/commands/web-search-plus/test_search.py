@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for scripts/search.py.
+No API keys or network access needed.
+
+Usage:
+    python3 test_search.py
+    python3 -m pytest test_search.py
+"""
+import copy
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+from urllib.request import Request
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+_stdout, _stderr = sys.stdout, sys.stderr
+import search  # noqa: E402
+
+# search.py rewraps stdout/stderr on import. Hand the test runner its own
+# streams back, but keep the wrappers referenced: collecting them would close
+# the underlying buffers.
+_SEARCH_STREAMS = (sys.stdout, sys.stderr)
+sys.stdout, sys.stderr = _stdout, _stderr
+
+
+def _keyed_config():
+    """DEFAULT_CONFIG with every provider usable, so routing considers them all."""
+    config = copy.deepcopy(search.DEFAULT_CONFIG)
+    for provider in ("serper", "tavily", "exa", "you"):
+        config.setdefault(provider, {})["api_key"] = "test-key"
+    config.setdefault("searxng", {})["instance_url"] = "https://searx.example.com"
+    return config
+
+
+class _TempCacheDir(unittest.TestCase):
+    """Point the disk cache at a fresh directory and reset in-process cache state."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(search, "CACHE_DIR", Path(self._tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+        search._MEM_CACHE.clear()
+        search._MISSING_KEYS.clear()
+        search._MISSING_DIR_MTIME = None
+
+
+class LoadJsonFieldsTest(unittest.TestCase):
+    def _large_body(self) -> bytes:
+        doc = {
+            "results": [{"title": f"t{i}", "url": f"https://example.com/{i}", "score": i / 10} for i in range(5)],
+            "answers": ["a"],
+            "infoboxes": [{"content": "x" * 1000} for _ in range(100)],
+        }
+        raw = json.dumps(doc).encode()
+        self.assertGreaterEqual(len(raw), search.STREAM_PARSE_MIN_BYTES)
+        return raw
+
+    def test_small_body_is_decoded_whole(self):
+        raw = json.dumps({"results": [1], "other": 2}).encode()
+        self.assertEqual(search._load_json_fields(raw, ("results",)), {"results": [1], "other": 2})
+
+    @unittest.skipIf(search.ijson is None, "ijson not installed")
+    def test_large_body_keeps_only_requested_fields(self):
+        raw = self._large_body()
+        full = json.loads(raw)
+        data = search._load_json_fields(raw, ("results", "answers"))
+        self.assertEqual(data, {"results": full["results"], "answers": full["answers"]})
+
+    @unittest.skipIf(search.ijson is None, "ijson not installed")
+    def test_large_body_missing_field_is_absent(self):
+        self.assertEqual(search._load_json_fields(self._large_body(), ("hits",)), {})
+
+    def test_large_body_without_ijson_is_decoded_whole(self):
+        raw = self._large_body()
+        with mock.patch.object(search, "ijson", None):
+            self.assertEqual(search._load_json_fields(raw, ("results",)), json.loads(raw))
+
+
+class FillLockTest(_TempCacheDir):
+    def test_second_caller_does_not_get_the_lock(self):
+        lock = search.acquire_fill_lock("q", "serper", 5)
+        self.assertIsNotNone(lock)
+        self.assertTrue(lock.exists())
+        self.assertIsNone(search.acquire_fill_lock("q", "serper", 5, block=False))
+        search.release_fill_lock(lock)
+        self.assertFalse(lock.exists())
+        again = search.acquire_fill_lock("q", "serper", 5, block=False)
+        self.assertEqual(again, lock)
+        search.release_fill_lock(again)
+
+    def test_different_entries_do_not_share_a_lock(self):
+        a = search.acquire_fill_lock("q", "serper", 5)
+        b = search.acquire_fill_lock("q", "serper", 10)
+        self.assertIsNotNone(a)
+        self.assertIsNotNone(b)
+        self.assertNotEqual(a, b)
+        search.release_fill_lock(a)
+        search.release_fill_lock(b)
+
+    def test_waiter_returns_once_holder_releases(self):
+        lock = search.acquire_fill_lock("q", "serper", 5)
+        threading.Timer(0.2, search.release_fill_lock, args=(lock,)).start()
+        started = time.monotonic()
+        self.assertIsNone(search.acquire_fill_lock("q", "serper", 5, wait=5.0))
+        elapsed = time.monotonic() - started
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertLess(elapsed, 2.0)
+
+    def test_waiter_gives_up_after_wait(self):
+        lock = search.acquire_fill_lock("q", "serper", 5)
+        started = time.monotonic()
+        self.assertIsNone(search.acquire_fill_lock("q", "serper", 5, wait=0.2))
+        self.assertLess(time.monotonic() - started, 2.0)
+        search.release_fill_lock(lock)
+
+    def test_stale_lock_is_taken_over(self):
+        lock = search.acquire_fill_lock("q", "serper", 5)
+        old = time.time() - 60
+        os.utime(lock, (old, old))
+        self.assertEqual(search.acquire_fill_lock("q", "serper", 5, wait=30.0), lock)
+        search.release_fill_lock(lock)
+
+    def test_release_ignores_none(self):
+        search.release_fill_lock(None)
+
+
+class NegativeCacheTest(_TempCacheDir):
+    def setUp(self):
+        super().setUp()
+        search._ensure_cache_dir()
+
+    def test_repeated_miss_skips_the_disk_probe(self):
+        self.assertEqual(search.cache_get("q", "serper", 5), (None, False))
+        key = search._get_cache_key("q", "serper", 5)
+        self.assertIn(key, search._MISSING_KEYS)
+        with mock.patch.object(search, "_cache_path_candidates") as candidates:
+            self.assertEqual(search.cache_get("q", "serper", 5), (None, False))
+        candidates.assert_not_called()
+
+    def test_cache_put_clears_the_miss(self):
+        search.cache_get("q", "serper", 5)
+        search.cache_put("q", "serper", 5, {"results": [1]})
+        entry, stale = search.cache_get("q", "serper", 5)
+        self.assertEqual(entry["results"], [1])
+        self.assertFalse(stale)
+
+    def test_entry_written_by_another_process_is_found(self):
+        self.assertEqual(search.cache_get("q", "serper", 5), (None, False))
+        key = search._get_cache_key("q", "serper", 5)
+        # Another process writes the entry; this one still remembers the miss
+        search.cache_put("q", "serper", 5, {"results": [2]})
+        search._MEM_CACHE.clear()
+        search._MISSING_KEYS.add(key)
+        bumped = os.stat(search.CACHE_DIR).st_mtime_ns + 1_000_000
+        os.utime(search.CACHE_DIR, ns=(bumped, bumped))
+        entry, _ = search.cache_get("q", "serper", 5)
+        self.assertEqual(entry["results"], [2])
+        self.assertNotIn(key, search._MISSING_KEYS)
+
+    def test_missing_cache_dir_is_a_miss(self):
+        with mock.patch.object(search, "CACHE_DIR", Path(self._tmp.name) / "absent"):
+            self.assertEqual(search.cache_get("q", "serper", 5), (None, False))
+
+
+class CachedRequestTest(unittest.TestCase):
+    def setUp(self):
+        search._RESPONSE_CACHE.clear()
+        search._INFLIGHT.clear()
+
+    def test_identical_call_is_served_from_cache(self):
+        calls = []
+
+        @search.cached_request()
+        def fetch(url, headers):
+            calls.append(url)
+            return {"url": url}
+
+        self.assertEqual(fetch("https://example.com", {}), {"url": "https://example.com"})
+        self.assertEqual(fetch("https://example.com", {}), {"url": "https://example.com"})
+        self.assertEqual(len(calls), 1)
+
+    def test_system_exit_releases_the_inflight_entry(self):
+        calls = []
+
+        @search.cached_request()
+        def fetch(url, headers):
+            calls.append(url)
+            if len(calls) == 1:
+                sys.exit(1)
+            return {"url": url}
+
+        with self.assertRaises(SystemExit):
+            fetch("https://example.com", {})
+        self.assertEqual(search._INFLIGHT, {})
+        self.assertEqual(fetch("https://example.com", {}), {"url": "https://example.com"})
+
+    def test_unserializable_result_releases_the_inflight_entry(self):
+        @search.cached_request()
+        def fetch(url, headers):
+            return {"value": object()}
+
+        with self.assertRaises(TypeError):
+            fetch("https://example.com", {})
+        self.assertEqual(search._INFLIGHT, {})
+
+    def test_waiter_gets_the_leader_failure(self):
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        @search.cached_request()
+        def fetch(url, headers):
+            started.set()
+            release.wait(5)
+            sys.exit(1)
+
+        leader = threading.Thread(target=lambda: self.assertRaises(SystemExit, fetch, "https://example.com", {}), daemon=True)
+        leader.start()
+        self.assertTrue(started.wait(5))
+        outcome = []
+
+        def wait_for_leader():
+            try:
+                fetch("https://example.com", {})
+            except SystemExit:
+                outcome.append("exit")
+
+        waiter = threading.Thread(target=wait_for_leader, daemon=True)
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        waiter.join(5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(outcome, ["exit"])
+        self.assertEqual(search._INFLIGHT, {})
+
+
+class RoutingPathsTest(unittest.TestCase):
+    """analyze()/route() agree whichever optional signal matchers are installed."""
+
+    CORPUS = (
+        # Hyperscan once missed (看法|观点).*(关于|on|about) here
+        "的观点 how restaurants near angebot is private on",
+        "how much does the iphone 16 cost",
+        "where to buy a cheap standing desk under $300",
+        "best price for sony wh-1000xm5 headphones deal",
+        "was kostet ein günstiger laptop im angebot",
+        "wo kaufen rabatt kopfhörer",
+        "restaurants near me open now",
+        "weather forecast berlin today",
+        "latest news on the 2025 election",
+        "explain the difference between tcp and udp in detail",
+        "research papers on transformer attention mechanisms",
+        "compare postgres vs mysql pros and cons",
+        "companies like stripe for payments",
+        "startups similar to notion",
+        "summarize the key points of the paris agreement",
+        "tl;dr of rust ownership rules",
+        "private search without tracking",
+        "meta search from multiple sources anonymously",
+        "kostenlose suche ohne tracking datenschutz",
+        "github trending rust repos",
+        "github alternative like gitlab",
+        "what do people think about bun on reddit r/javascript",
+        "tweets from @elonmusk about #AI",
+        "x trending topics today",
+        "linux.do 佬友 开发调优 讨论",
+        "l站 资源荟萃 跳蚤市场",
+        "大家怎么看 最新 的 手机 价格",
+        "关于 人工智能 的 看法 和 趋势",
+        "社区 热门 讨论 about python",
+        "https://github.com/python/cpython/issues",
+        "check https://example.com/pricing price",
+        "order by clause in sql",
+        "budget laptop for students",
+        "hot posts on hacker news community",
+        "",
+    )
+
+    @classmethod
+    def _results(cls, hyperscan, ahocorasick):
+        """Analysis and routing of CORPUS with only the given matcher modules available."""
+        with mock.patch.object(search, "hyperscan", hyperscan), \
+                mock.patch.object(search, "ahocorasick", ahocorasick):
+            # A fresh subclass compiles its own matchers and gets its own cache entries
+            analyzer_cls = type("PathAnalyzer", (search.QueryAnalyzer,), {})
+            analyzer_cls._compile_signals()
+            social = search._build_social_matchers()
+        results = []
+        with mock.patch.object(search, "_SOCIAL_AUTOMATON", social[0]), \
+                mock.patch.object(search, "_SOCIAL_PLATFORM_RES", social[1]):
+            search._detect_social_platforms.cache_clear()
+            try:
+                for config in (_keyed_config(), search.DEFAULT_CONFIG):
+                    analyzer = analyzer_cls(config)
+                    for query in cls.CORPUS:
+                        results.append((
+                            query,
+                            analyzer.analyze(query),
+                            analyzer.route(query),
+                            analyzer.route(query, explain=True),
+                        ))
+            finally:
+                search._detect_social_platforms.cache_clear()
+        return results
+
+    def _assert_same_as_re(self, hyperscan, ahocorasick):
+        expected = self._results(None, None)
+        for want, got in zip(expected, self._results(hyperscan, ahocorasick)):
+            with self.subTest(query=want[0]):
+                self.assertEqual(got, want)
+
+    def test_mixed_cjk_query_keeps_its_social_signal(self):
+        analysis = search.QueryAnalyzer(search.DEFAULT_CONFIG).analyze(self.CORPUS[0])
+        patterns = [m["pattern"] for m in analysis["provider_matches"]["github"]]
+        self.assertIn(r'(看法|观点).*(关于|on|about)', patterns)
+
+    @unittest.skipIf(search.ahocorasick is None, "pyahocorasick not installed")
+    def test_ahocorasick_matches_re(self):
+        self._assert_same_as_re(None, search.ahocorasick)
+
+    @unittest.skipIf(search.hyperscan is None, "hyperscan not installed")
+    def test_hyperscan_matches_re(self):
+        self._assert_same_as_re(search.hyperscan, search.ahocorasick)
+
+    @unittest.skipIf(search.hyperscan is None, "hyperscan not installed")
+    def test_hyperscan_without_ahocorasick_matches_re(self):
+        self._assert_same_as_re(search.hyperscan, None)
+
+
+class RouteScoresTest(unittest.TestCase):
+    # Dominated by shopping signals, so the early exit prunes categories
+    QUERY = "buy iphone 15 price cheapest deal discount amazon shop best price near me coupon"
+
+    def setUp(self):
+        self.analyzer = search.QueryAnalyzer(_keyed_config())
+
+    def test_pruned_providers_report_a_lower_bound(self):
+        routing = self.analyzer.route(self.QUERY)
+        full = self.analyzer.route(self.QUERY, explain=True)
+        self.assertTrue(routing["pruned"])
+        self.assertEqual(list(routing["scores"]), list(full["scores"]))
+        for provider, score in routing["scores"].items():
+            self.assertIsInstance(score, float)
+            if provider in routing["pruned"]:
+                self.assertLessEqual(score, round(full["scores"][provider], 2))
+            else:
+                self.assertEqual(score, round(full["scores"][provider], 2))
+
+    def test_nothing_pruned_without_a_dominant_provider(self):
+        routing = self.analyzer.route("what is the meaning of life")
+        full = self.analyzer.route("what is the meaning of life", explain=True)
+        self.assertEqual(routing["pruned"], [])
+        self.assertEqual(routing["scores"], {p: round(s, 2) for p, s in full["scores"].items()})
+
+
+@unittest.skipUnless(search.httpx, "httpx not installed")
+class Http2ClientTest(unittest.TestCase):
+    def _client_with(self, handler):
+        """Make _http2_client() build its client on a fake transport."""
+        real_client = search.httpx.Client
+
+        def client(**kwargs):
+            return real_client(transport=search.httpx.MockTransport(handler), **kwargs)
+
+        for patcher in (
+            mock.patch.object(search, "_HTTP2_CLIENT", None),
+            mock.patch.object(search.httpx, "Client", client),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_redirect_is_followed(self):
+        def handler(request):
+            if request.url.path == "/r/Python/search.json":
+                return search.httpx.Response(301, headers={"Location": "https://www.reddit.com/r/python/search.json"})
+            return search.httpx.Response(200, json={"data": {"children": []}})
+
+        self._client_with(handler)
+        raw = search._urlopen_read(Request("https://www.reddit.com/r/Python/search.json"), 5)
+        self.assertEqual(json.loads(raw), {"data": {"children": []}})
+
+    def test_error_status_raises_http_error(self):
+        self._client_with(lambda request: search.httpx.Response(404, text="missing"))
+        with self.assertRaises(search.HTTPError) as ctx:
+            search._urlopen_read(Request("https://api.github.com/repos/a/b"), 5)
+        self.assertEqual(ctx.exception.code, 404)
+
+
+class SearchWithFallbackTest(unittest.TestCase):
+    def test_first_success_wins(self):
+        calls = []
+
+        def run(prov):
+            calls.append(prov)
+            return {"provider": prov}
+
+        result, prov, errors = search.search_with_fallback(["serper", "tavily"], run)
+        self.assertEqual((result, prov, errors), ({"provider": "serper"}, "serper", []))
+        self.assertEqual(calls, ["serper"])
+
+    def test_failure_moves_on_and_is_reported(self):
+        seen = []
+
+        def run(prov):
+            if prov == "serper":
+                raise RuntimeError("serper down")
+            return {"provider": prov}
+
+        result, prov, errors = search.search_with_fallback(
+            ["serper", "tavily"], run, on_error=lambda p, e, nxt: seen.append((p, str(e), nxt))
+        )
+        self.assertEqual(prov, "tavily")
+        self.assertEqual(errors, [{"provider": "serper", "error": "serper down"}])
+        self.assertEqual(seen, [("serper", "serper down", "tavily")])
+
+    def test_all_failed(self):
+        def run(prov):
+            raise RuntimeError(f"{prov} down")
+
+        result, prov, errors = search.search_with_fallback(["serper", "tavily"], run)
+        self.assertIsNone(result)
+        self.assertIsNone(prov)
+        self.assertEqual([e["provider"] for e in errors], ["serper", "tavily"])
+
+    def test_system_exit_reaches_the_caller(self):
+        def run(prov):
+            sys.exit(1)
+
+        for hedge_after in (0, 0.05):
+            with self.subTest(hedge_after=hedge_after):
+                with self.assertRaises(SystemExit):
+                    search.search_with_fallback(["serper", "tavily"], run, hedge_after=hedge_after)
+
+    def test_sequential_by_default(self):
+        calls = []
+
+        def run(prov):
+            calls.append(prov)
+            if prov == "serper":
+                time.sleep(0.3)
+            return {"provider": prov}
+
+        _, prov, _ = search.search_with_fallback(["serper", "tavily"], run)
+        self.assertEqual(prov, "serper")
+        self.assertEqual(calls, ["serper"])
+
+    def test_hedge_races_a_slow_provider(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def run(prov):
+            if prov == "serper":
+                release.wait(5)
+            return {"provider": prov}
+
+        started = time.monotonic()
+        result, prov, errors = search.search_with_fallback(["serper", "tavily"], run, hedge_after=0.05)
+        self.assertEqual(prov, "tavily")
+        self.assertEqual(errors, [])  # the outrun provider did not fail
+        self.assertLess(time.monotonic() - started, 2.0)
+
+    def test_hedge_runs_at_most_two_providers(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def run(prov):
+            with lock:
+                running.append(prov)
+                peak.append(len(running))
+            try:
+                if prov != "you":
+                    release.wait(0.5)
+                    raise RuntimeError(f"{prov} timed out")
+                return {"provider": prov}
+            finally:
+                with lock:
+                    running.remove(prov)
+
+        _, prov, errors = search.search_with_fallback(["serper", "tavily", "exa", "you"], run, hedge_after=0.05)
+        self.assertEqual(prov, "you")
+        self.assertLessEqual(max(peak), 2)
+        failed = {e["provider"] for e in errors}
+        self.assertIn("serper", failed)
+        self.assertLessEqual(failed, {"serper", "tavily", "exa"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,40 +1,85 @@
+from datetime import datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from app.database import get_db
+from sqlalchemy import select, tuple_, update, delete
+from app.database import get_db, AsyncSessionLocal
 from app.models.board import Board
 from app.schemas.board import BoardCreate, BoardUpdate, BoardResponse, BoardListItem
 
 router = APIRouter()
 
 
-@router.get("/", response_model=list[BoardListItem])
-async def list_boards(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(
-            Board.id,
-            Board.name,
-            Board.description,
-            Board.thumbnail_url,
-            func.jsonb_array_length(Board.nodes).label("node_count"),
-            Board.created_at,
-            Board.updated_at,
-        ).order_by(Board.updated_at.desc())
+def _board_list_stmt(cursor: tuple[datetime, UUID] | None):
+    stmt = select(
+        Board.id,
+        Board.name,
+        Board.description,
+        Board.thumbnail_url,
+        Board.node_count,
+        Board.created_at,
+        Board.updated_at,
+    ).order_by(Board.updated_at.desc(), Board.id.desc())
+    if cursor is not None:
+        # 键集分页：(updated_at, id) 行比较，updated_at 相同的画布也不会被跳过
+        stmt = stmt.where(tuple_(Board.updated_at, Board.id) < tuple_(*cursor))
+    return stmt
+
+
+def _board_cursor(cursor: datetime | None, cursor_id: UUID | None) -> tuple[datetime, UUID] | None:
+    if cursor is None and cursor_id is None:
+        return None
+    if cursor is None or cursor_id is None:
+        raise HTTPException(status_code=400, detail="cursor and cursor_id must be given together")
+    return cursor, cursor_id
+
+
+def _board_list_item(r) -> BoardListItem:
+    return BoardListItem(
+        id=r.id,
+        name=r.name,
+        description=r.description,
+        thumbnail_url=r.thumbnail_url,
+        node_count=r.node_count,
+        created_at=r.created_at,
+        updated_at=r.updated_at,
     )
-    rows = result.all()
-    return [
-        BoardListItem(
-            id=r.id,
-            name=r.name,
-            description=r.description,
-            thumbnail_url=r.thumbnail_url,
-            node_count=r.node_count or 0,
-            created_at=r.created_at,
-            updated_at=r.updated_at,
-        )
-        for r in rows
-    ]
+
+
+@router.get("/", response_model=list[BoardListItem])
+async def list_boards(
+    limit: int | None = Query(None, ge=1, le=200, description="不传则返回全部"),
+    cursor: datetime | None = Query(None, description="上一页最后一项的 updated_at"),
+    cursor_id: UUID | None = Query(None, description="上一页最后一项的 id"),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = _board_list_stmt(_board_cursor(cursor, cursor_id))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await db.stream(stmt)
+    return [_board_list_item(r) async for r in result]
+
+
+@router.get("/stream")
+async def stream_boards(
+    cursor: datetime | None = Query(None, description="从该 updated_at 之后开始输出"),
+    cursor_id: UUID | None = Query(None, description="与 cursor 配套的 id"),
+):
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Database not configured. Set DATABASE_URL in .env")
+    stmt = _board_list_stmt(_board_cursor(cursor, cursor_id))
+
+    async def ndjson():
+        # 响应体在端点返回后才开始发送，会话必须由生成器自己持有，不能借用 get_db 的
+        async with AsyncSessionLocal() as db:
+            # 服务端游标分批读取，逐行输出 NDJSON，不在内存中物化整个列表
+            result = await db.stream(stmt.execution_options(yield_per=100))
+            async for r in result:
+                yield orjson.dumps(_board_list_item(r).model_dump()) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 @router.post("/", response_model=BoardResponse, status_code=201)
@@ -55,24 +100,35 @@ async def get_board(board_id: UUID, db: AsyncSession = Depends(get_db)):
     return board
 
 
+@router.get("/{board_id}/meta", response_model=BoardListItem)
+async def get_board_meta(board_id: UUID, db: AsyncSession = Depends(get_db)):
+    # 只取元数据列，不把 nodes/edges 这类大 JSONB 从数据库搬出来
+    result = await db.execute(_board_list_stmt(None).where(Board.id == board_id))
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return _board_list_item(row)
+
+
 @router.put("/{board_id}", response_model=BoardResponse)
 async def update_board(board_id: UUID, data: BoardUpdate, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Board).where(Board.id == board_id))
+    values = data.model_dump(exclude_unset=True)
+    if not values:
+        return await get_board(board_id, db)
+    # Single UPDATE ... RETURNING instead of SELECT + UPDATE + refresh
+    result = await db.execute(
+        update(Board).where(Board.id == board_id).values(**values).returning(Board)
+    )
     board = result.scalar_one_or_none()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
-    for key, value in data.model_dump(exclude_unset=True).items():
-        setattr(board, key, value)
     await db.commit()
-    await db.refresh(board)
     return board
 
 
 @router.delete("/{board_id}", status_code=204)
 async def delete_board(board_id: UUID, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Board).where(Board.id == board_id))
-    board = result.scalar_one_or_none()
-    if not board:
+    result = await db.execute(delete(Board).where(Board.id == board_id).returning(Board.id))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Board not found")
-    await db.delete(board)
     await db.commit()
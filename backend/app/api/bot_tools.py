@@ -2,14 +2,14 @@
 from __future__ import annotations
 
 import logging
-import re
+import string
 import uuid
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from app.database import get_db, get_ro_conn
 from app.models.extras import BotTool
 
 logger = logging.getLogger(__name__)
@@ -17,6 +17,10 @@ router = APIRouter()
 
 EXCLUDED_PREFIXES = ("/api/v1/bot-tools", "/api/v1/health", "/api/v1/config", "/api/v1/sandbox", "/api/v1/external-services")
 MUTATION_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# 路由路径只有 ASCII：非字母数字字符一律映射成 "_"
+_NONWORD_TRANS = str.maketrans({
+    chr(c): "_" for c in range(128) if chr(c) not in string.ascii_letters + string.digits
+})
 
 
 # ── 辅助函数 ─────────────────────────────────────────────────
@@ -109,11 +113,35 @@ def _extract_parameters(openapi: dict, path: str, method: str) -> dict:
     return result
 
 
+def _replace_path_params(path: str) -> str:
+    """把 {xxx} 路径参数替换为 by_id（空的 {} 不算参数）"""
+    start = path.find("{")
+    if start < 0:
+        return path
+    parts: list[str] = []
+    pos = 0
+    while start >= 0:
+        end = path.find("}", start + 1)
+        if end < 0:
+            break
+        if end == start + 1:
+            start = path.find("{", start + 1)
+            continue
+        parts.append(path[pos:start])
+        parts.append("by_id")
+        pos = end + 1
+        start = path.find("{", pos)
+    parts.append(path[pos:])
+    return "".join(parts)
+
+
 def _path_to_tool_name(method: str, path: str) -> str:
     """从 method + path 生成 snake_case 工具名。"""
     clean = path.replace("/api/v1/", "").strip("/")
-    clean = re.sub(r"\{[^}]+\}", "by_id", clean)
-    clean = re.sub(r"[^a-zA-Z0-9]+", "_", clean).strip("_")
+    clean = _replace_path_params(clean).translate(_NONWORD_TRANS)
+    while "__" in clean:
+        clean = clean.replace("__", "_")
+    clean = clean.strip("_")
     prefix_map = {"GET": "get", "POST": "create", "PUT": "update", "PATCH": "patch", "DELETE": "delete"}
     prefix = prefix_map.get(method, method.lower())
     return f"{prefix}_{clean}"
@@ -141,41 +169,82 @@ def _build_param_mapping(openapi: dict, path: str, method: str) -> dict:
     return mapping
 
 
-def _tool_to_dict(t: BotTool) -> dict:
-    return {
-        "id": str(t.id),
-        "name": t.name,
-        "description": t.description,
-        "action_type": t.action_type,
-        "endpoint": t.endpoint,
-        "method": t.method,
-        "param_mapping": t.param_mapping,
-        "parameters": t.parameters,
-        "service_id": str(t.service_id) if t.service_id else None,
-        "enabled": t.enabled,
-        "created_at": t.created_at.isoformat() if t.created_at else None,
-        "updated_at": t.updated_at.isoformat() if t.updated_at else None,
-    }
+def _discover_tools(app) -> dict[str, dict]:
+    """扫描 OpenAPI schema 得到所有业务端点，key = "METHOD /path"。
+
+    app.openapi() 生成一次后即被 FastAPI 缓存，这里按同一个 schema 对象缓存扫描结果，
+    重复 sync 不再逐个端点解析参数。
+    """
+    openapi = app.openapi()
+    cached = getattr(app.state, "bot_tools_discovered", None)
+    if cached is not None and cached[0] is openapi:
+        return cached[1]
+
+    discovered: dict[str, dict] = {}
+    for path, path_obj in openapi.get("paths", {}).items():
+        if any(path.startswith(p) for p in EXCLUDED_PREFIXES):
+            continue
+        if not path.startswith("/api/v1/"):
+            continue
+        for method_lower, op in path_obj.items():
+            if method_lower in ("parameters", "servers", "summary", "description"):
+                continue
+            method = method_lower.upper()
+            if method in ("HEAD", "OPTIONS"):
+                continue
+            key = f"{method} {path}"
+            summary = op.get("summary") or op.get("operationId", "").replace("_", " ").title()
+            discovered[key] = {
+                "name": _path_to_tool_name(method, path),
+                "description": summary,
+                "action_type": "mutation" if method in MUTATION_METHODS else "query",
+                "endpoint": path,
+                "method": method,
+                "parameters": _extract_parameters(openapi, path, method),
+                "param_mapping": _build_param_mapping(openapi, path, method),
+            }
+
+    app.state.bot_tools_discovered = (openapi, discovered)
+    return discovered
 
 
 # ── API 端点 ─────────────────────────────────────────────────
 
 @router.get("/")
-async def list_tools(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(BotTool).order_by(BotTool.name))
-    return [_tool_to_dict(t) for t in result.scalars().all()]
+async def list_tools(conn: AsyncConnection = Depends(get_ro_conn)):
+    # 直接按列取行，UUID / datetime 交给响应序列化处理，不再逐行构建 ORM 对象
+    result = await conn.execute(
+        select(
+            BotTool.id,
+            BotTool.name,
+            BotTool.description,
+            BotTool.action_type,
+            BotTool.endpoint,
+            BotTool.method,
+            BotTool.param_mapping,
+            BotTool.parameters,
+            BotTool.service_id,
+            BotTool.enabled,
+            BotTool.created_at,
+            BotTool.updated_at,
+        ).order_by(BotTool.name)
+    )
+    return result.mappings().all()
 
 
 @router.post("/{tool_id}/toggle")
 async def toggle_tool(tool_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(BotTool).where(BotTool.id == tool_id))
-    tool = result.scalar_one_or_none()
-    if not tool:
+    # 取反和读回新状态在一条 UPDATE ... RETURNING 里完成
+    enabled = await db.scalar(
+        update(BotTool)
+        .where(BotTool.id == tool_id)
+        .values(enabled=~BotTool.enabled, updated_at=datetime.utcnow())
+        .returning(BotTool.enabled)
+    )
+    if enabled is None:
         raise HTTPException(status_code=404, detail="Tool not found")
-    tool.enabled = not tool.enabled
-    tool.updated_at = datetime.utcnow()
     await db.commit()
-    return {"enabled": tool.enabled}
+    return {"enabled": enabled}
 
 
 @router.post("/bulk-enable")
@@ -183,17 +252,14 @@ async def bulk_enable(data: BulkEnableRequest, db: AsyncSession = Depends(get_db
     """批量启用/禁用工具"""
     if not data.ids:
         return {"updated": 0}
+    # 只改状态不同的行，受影响行数即变更数
     result = await db.execute(
-        select(BotTool).where(BotTool.id.in_(data.ids))
+        update(BotTool)
+        .where(BotTool.id.in_(data.ids), BotTool.enabled != data.enabled)
+        .values(enabled=data.enabled, updated_at=datetime.utcnow())
     )
-    count = 0
-    for tool in result.scalars().all():
-        if tool.enabled != data.enabled:
-            tool.enabled = data.enabled
-            tool.updated_at = datetime.utcnow()
-            count += 1
     await db.commit()
-    return {"updated": count}
+    return {"updated": result.rowcount}
 
 
 @router.post("/sync")
@@ -204,74 +270,49 @@ async def sync_tools(request: Request, db: AsyncSession = Depends(get_db)):
     - 已存在的端点 → 更新签名（保留 enabled 状态）
     - 已消失的端点 → 标记 disabled
     """
-    openapi = request.app.openapi()
-    paths = openapi.get("paths", {})
-
-    # 收集所有有效端点
-    discovered: dict[str, dict] = {}  # key = "METHOD /path"
-    for path, path_obj in paths.items():
-        if any(path.startswith(p) for p in EXCLUDED_PREFIXES):
-            continue
-        if not path.startswith("/api/v1/"):
-            continue
-        for method_lower, op in path_obj.items():
-            if method_lower in ("parameters", "servers", "summary", "description"):
-                continue
-            method = method_lower.upper()
-            if method in ("HEAD", "OPTIONS"):
-                continue
-            key = f"{method} {path}"
-            summary = op.get("summary") or op.get("operationId", "").replace("_", " ").title()
-            discovered[key] = {
-                "name": _path_to_tool_name(method, path),
-                "description": summary,
-                "action_type": "mutation" if method in MUTATION_METHODS else "query",
-                "endpoint": path,
-                "method": method,
-                "parameters": _extract_parameters(openapi, path, method),
-                "param_mapping": _build_param_mapping(openapi, path, method),
-            }
+    discovered = _discover_tools(request.app)
 
-    # 加载现有工具（以 method+endpoint 为键）
-    result = await db.execute(select(BotTool))
-    existing: dict[str, BotTool] = {}
-    for t in result.scalars().all():
-        existing[f"{t.method} {t.endpoint}"] = t
+    # 加载现有工具（以 method+endpoint 为键），只取匹配和判断需要的列
+    result = await db.execute(select(BotTool.id, BotTool.method, BotTool.endpoint, BotTool.enabled))
+    existing = {f"{r.method} {r.endpoint}": r for r in result.all()}
 
-    created = 0
-    updated = 0
-    removed = 0
+    now = datetime.utcnow()
+    update_rows: list[dict] = []
+    insert_rows: list[dict] = []
 
-    # upsert
+    # upsert 与消失判定合成一趟：命中的从 existing 里弹出，剩下的就是已消失的端点
     for key, info in discovered.items():
-        if key in existing:
-            tool = existing[key]
-            tool.description = info["description"]
-            tool.parameters = info["parameters"]
-            tool.param_mapping = info["param_mapping"]
-            tool.action_type = info["action_type"]
-            tool.updated_at = datetime.utcnow()
-            updated += 1
+        row = existing.pop(key, None)
+        if row is not None:
+            update_rows.append({
+                "id": row.id,
+                "description": info["description"],
+                "parameters": info["parameters"],
+                "param_mapping": info["param_mapping"],
+                "action_type": info["action_type"],
+                "updated_at": now,
+            })
         else:
-            tool = BotTool(
-                name=info["name"],
-                description=info["description"],
-                action_type=info["action_type"],
-                endpoint=info["endpoint"],
-                method=info["method"],
-                parameters=info["parameters"],
-                param_mapping=info["param_mapping"],
-                enabled=True,
-            )
-            db.add(tool)
-            created += 1
+            insert_rows.append({**info, "enabled": True})
 
     # 标记已消失的端点为 disabled
-    for key, tool in existing.items():
-        if key not in discovered and tool.enabled:
-            tool.enabled = False
-            tool.updated_at = datetime.utcnow()
-            removed += 1
+    disable_ids = [r.id for r in existing.values() if r.enabled]
+
+    # 每类变更一条语句（executemany），不再逐行 flush ORM 对象
+    # seed 里有同 method+endpoint 的工具，没有唯一约束可做 ON CONFLICT，按主键批量更新
+    if update_rows:
+        await db.execute(update(BotTool), update_rows)
+    if insert_rows:
+        await db.execute(insert(BotTool), insert_rows)
+    if disable_ids:
+        await db.execute(
+            update(BotTool).where(BotTool.id.in_(disable_ids)).values(enabled=False, updated_at=now)
+        )
 
     await db.commit()
-    return {"created": created, "updated": updated, "removed": removed, "total": len(discovered)}
+    return {
+        "created": len(insert_rows),
+        "updated": len(update_rows),
+        "removed": len(disable_ids),
+        "total": len(discovered),
+    }
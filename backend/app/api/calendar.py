@@ -2,13 +2,15 @@ from uuid import UUID
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy import bindparam, select
+from app.database import get_db, get_ro_conn
 from app.models.extras import CalendarEvent
 
 router = APIRouter()
 
+_SELECT_EVENT = select(CalendarEvent).where(CalendarEvent.id == bindparam("event_id"))
+
 
 class EventCreate(BaseModel):
     title: str
@@ -31,15 +33,15 @@ class EventUpdate(BaseModel):
 async def list_events(
     start: datetime | None = Query(None),
     end: datetime | None = Query(None),
-    db: AsyncSession = Depends(get_db),
+    conn: AsyncConnection = Depends(get_ro_conn),
 ):
-    query = select(CalendarEvent).order_by(CalendarEvent.start_time)
+    query = select(*CalendarEvent.__table__.c).order_by(CalendarEvent.start_time)
     if start:
         query = query.where(CalendarEvent.start_time >= start)
     if end:
         query = query.where(CalendarEvent.start_time <= end)
-    result = await db.execute(query)
-    return result.scalars().all()
+    result = await conn.execute(query)
+    return result.mappings().all()
 
 
 @router.post("/events", status_code=201)
@@ -53,7 +55,7 @@ async def create_event(data: EventCreate, db: AsyncSession = Depends(get_db)):
 
 @router.put("/events/{event_id}")
 async def update_event(event_id: UUID, data: EventUpdate, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(CalendarEvent).where(CalendarEvent.id == event_id))
+    result = await db.execute(_SELECT_EVENT, {"event_id": event_id})
     event = result.scalar_one_or_none()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -66,7 +68,7 @@ async def update_event(event_id: UUID, data: EventUpdate, db: AsyncSession = Dep
 
 @router.delete("/events/{event_id}", status_code=204)
 async def delete_event(event_id: UUID, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(CalendarEvent).where(CalendarEvent.id == event_id))
+    result = await db.execute(_SELECT_EVENT, {"event_id": event_id})
     event = result.scalar_one_or_none()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
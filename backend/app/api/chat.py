@@ -1,15 +1,16 @@
-import json
 import asyncio
 import logging
 import time
 import math
 from datetime import datetime
+from typing import Any
 from uuid import UUID
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, delete
-from app.database import get_db, AsyncSessionLocal
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy import bindparam, insert, select, or_, delete, update
+from app.database import get_db, get_ro_conn, AsyncSessionLocal
 from app.models.extras import Conversation, Message
 from app.schemas.chat import (
     ConversationCreate,
@@ -28,18 +29,69 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 列表接口只取响应模型需要的列，按行映射返回，跳过 ORM 对象构建和 identity map
+_CONVERSATION_LIST_COLUMNS = (
+    Conversation.id,
+    Conversation.title,
+    Conversation.knowledge_base_ids,
+    Conversation.model_provider,
+    Conversation.is_pinned,
+    Conversation.pinned_at,
+    Conversation.channel,
+    Conversation.default_modes,
+    Conversation.created_at,
+    Conversation.updated_at,
+)
+_MESSAGE_LIST_COLUMNS = (
+    Message.id,
+    Message.conversation_id,
+    Message.role,
+    Message.content,
+    Message.thinking_content,
+    Message.sources,
+    Message.attachments,
+    Message.tool_calls,
+    Message.model_used,
+    Message.tokens_used,
+    Message.prompt_tokens,
+    Message.completion_tokens,
+    Message.cost_usd,
+    Message.latency_ms,
+    Message.created_at,
+)
+# 按 id 取会话的语句在模块级构建一次，各端点复用同一个对象，编译缓存直接命中
+_SELECT_CONVERSATION = select(Conversation).where(Conversation.id == bindparam("conv_id"))
+_SELECT_CONVERSATION_ROW = select(*_CONVERSATION_LIST_COLUMNS).where(
+    Conversation.id == bindparam("conv_id")
+)
+# 助手消息每轮插入一次：语句在模块级构建好，id 由 RETURNING 带回，不走 ORM flush
+_INSERT_ASSISTANT_MESSAGE = insert(Message).values(
+    conversation_id=bindparam("conversation_id"),
+    role="assistant",
+    content=bindparam("content"),
+    thinking_content=bindparam("thinking_content"),
+    sources=bindparam("sources"),
+    tool_calls=bindparam("tool_calls"),
+    attachments=bindparam("attachments"),
+    model_used=bindparam("model_used"),
+    latency_ms=bindparam("latency_ms"),
+    prompt_tokens=bindparam("prompt_tokens"),
+    completion_tokens=bindparam("completion_tokens"),
+    tokens_used=bindparam("tokens_used"),
+).returning(Message.id)
+
 
 @router.get("/", response_model=list[ConversationResponse])
 async def list_conversations(db: AsyncSession = Depends(get_db)):
     result = await db.execute(
-        select(Conversation)
+        select(*_CONVERSATION_LIST_COLUMNS)
         .order_by(
             Conversation.is_pinned.desc(),
             Conversation.pinned_at.desc().nullslast(),
             Conversation.updated_at.desc(),
         )
     )
-    return result.scalars().all()
+    return result.mappings().all()
 
 
 @router.post("/", response_model=ConversationResponse, status_code=201)
@@ -78,25 +130,27 @@ async def search_conversations(q: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/{conv_id}", response_model=ConversationResponse)
-async def get_conversation(conv_id: UUID, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
-    conv = result.scalar_one_or_none()
+async def get_conversation(conv_id: UUID, conn: AsyncConnection = Depends(get_ro_conn)):
+    result = await conn.execute(_SELECT_CONVERSATION_ROW, {"conv_id": conv_id})
+    conv = result.mappings().one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return conv
 
 
 @router.get("/{conv_id}/messages", response_model=list[MessageResponse])
-async def list_messages(conv_id: UUID, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Message).where(Message.conversation_id == conv_id).order_by(Message.created_at)
+async def list_messages(conv_id: UUID, conn: AsyncConnection = Depends(get_ro_conn)):
+    result = await conn.execute(
+        select(*_MESSAGE_LIST_COLUMNS)
+        .where(Message.conversation_id == conv_id)
+        .order_by(Message.created_at)
     )
-    return result.scalars().all()
+    return result.mappings().all()
 
 
 @router.delete("/{conv_id}", status_code=204)
 async def delete_conversation(conv_id: UUID, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -110,7 +164,7 @@ async def update_conversation(
     data: ConversationUpdate,
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -132,7 +186,7 @@ async def update_conversation(
 
 @router.post("/{conv_id}/messages")
 async def send_message(conv_id: UUID, data: MessageCreate, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -149,11 +203,10 @@ async def send_message(conv_id: UUID, data: MessageCreate, db: AsyncSession = De
     )
     db.add(user_msg)
     conv.updated_at = datetime.utcnow()
-    await db.commit()
-
     if not conv.title:
         conv.title = data.content[:50] + ("..." if len(data.content) > 50 else "")
-        await db.commit()
+    # 消息、标题、模型切换一次提交
+    await db.commit()
 
     # 决定增强模式
     modes = set(data.modes or conv.default_modes or ["knowledge"])
@@ -182,7 +235,7 @@ async def send_message(conv_id: UUID, data: MessageCreate, db: AsyncSession = De
 
 @router.put("/{conv_id}/model", response_model=ConversationResponse)
 async def switch_model(conv_id: UUID, data: ModelSwitch, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -194,7 +247,7 @@ async def switch_model(conv_id: UUID, data: ModelSwitch, db: AsyncSession = Depe
 
 @router.post("/{conv_id}/regenerate")
 async def regenerate_last_answer(conv_id: UUID, data: MessageCreate | None = None, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -240,7 +293,7 @@ async def edit_last_user_message(
     data: MessageCreate,
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -285,7 +338,7 @@ async def edit_last_user_message(
 
 @router.get("/{conv_id}/memory", response_model=ConversationMemoryResponse)
 async def get_conversation_memory(conv_id: UUID, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -302,7 +355,7 @@ async def update_conversation_memory(
     data: ConversationMemoryUpdate,
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+    result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
     conv = result.scalar_one_or_none()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -324,7 +377,7 @@ async def update_conversation_memory(
 async def refresh_conversation_memory(conv_id: UUID):
     await _update_conversation_memory(conv_id)
     async with AsyncSessionLocal() as db:
-        result = await db.execute(select(Conversation).where(Conversation.id == conv_id))
+        result = await db.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
         conv = result.scalar_one_or_none()
         if not conv:
             raise HTTPException(status_code=404, detail="Conversation not found")
@@ -337,7 +390,7 @@ async def refresh_conversation_memory(conv_id: UUID):
 
 async def _update_conversation_memory(conv_id: UUID) -> None:
     async with AsyncSessionLocal() as session:
-        result = await session.execute(select(Conversation).where(Conversation.id == conv_id))
+        result = await session.execute(_SELECT_CONVERSATION, {"conv_id": conv_id})
         conv = result.scalar_one_or_none()
         if not conv or not conv.memory_enabled:
             return
@@ -398,6 +451,16 @@ def _estimate_tokens(text: str) -> int:
     return max(1, math.ceil(len(text) / 4))
 
 
+_SSE_EVENTS = ("chunk", "thinking", "sources", "tool_start", "tool_result", "file_attachment", "done", "error")
+_SSE_PREFIXES = {name: f"event: {name}\ndata: ".encode() for name in _SSE_EVENTS}
+_SSE_END = b"\n\n"
+
+
+def _sse(event: str, data: Any) -> bytes:
+    """编码一帧 SSE：前缀预先编码好，数据由 orjson 直接生成 bytes"""
+    return _SSE_PREFIXES[event] + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + _SSE_END
+
+
 def _stream_pipeline_response(
     db: AsyncSession,
     conv: Conversation,
@@ -422,13 +485,32 @@ def _stream_pipeline_response(
 
     async def event_stream():
         started = time.monotonic()
-        full_content = ""
-        full_thinking = ""
+        # 逐块追加到列表，结束时 join 一次，避免长回答的字符串反复拷贝
+        content_parts: list[str] = []
+        thinking_parts: list[str] = []
         all_sources: list[dict] = []
         all_tool_calls: list[dict] = []
         all_file_attachments: list[dict] = []
         saved = False  # 标记消息是否已持久化
 
+        def _assistant_row() -> dict[str, Any]:
+            full_content = "".join(content_parts)
+            prompt_tokens = _estimate_tokens(message)
+            completion_tokens = _estimate_tokens(full_content)
+            return {
+                "conversation_id": conv_id,
+                "content": full_content,
+                "thinking_content": "".join(thinking_parts) or None,
+                "sources": all_sources,
+                "tool_calls": all_tool_calls,
+                "attachments": all_file_attachments if all_file_attachments else [],
+                "model_used": provider,
+                "latency_ms": int((time.monotonic() - started) * 1000),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "tokens_used": (prompt_tokens + completion_tokens) if (prompt_tokens or completion_tokens) else None,
+            }
+
         try:
             history = await _load_history()
             kb_ids = []
@@ -452,16 +534,16 @@ def _stream_pipeline_response(
 
             # 心跳计数：每 N 个 event 之间至少发一次 SSE comment 防止
             # 反向代理或浏览器 fetch 在长时间 silent 后 buffer/超时
-            yield ":\n\n"  # 立刻发一个 comment，让前端 fetch 更早开始读
+            yield b":\n\n"  # 立刻发一个 comment，让前端 fetch 更早开始读
             async for event in pipeline_run_stream(request, db):
                 if event.type == "text_chunk":
                     chunk = event.data.get("content", "")
-                    full_content += chunk
-                    yield f"event: chunk\ndata: {json.dumps({'content': chunk, 'type': 'text'})}\n\n"
+                    content_parts.append(chunk)
+                    yield _sse("chunk", {"content": chunk, "type": "text"})
                 elif event.type == "thinking":
                     chunk = event.data.get("content", "")
-                    full_thinking += chunk
-                    yield f"event: thinking\ndata: {json.dumps({'content': chunk})}\n\n"
+                    thinking_parts.append(chunk)
+                    yield _sse("thinking", {"content": chunk})
                 elif event.type == "sources":
                     all_sources = event.data.get("sources", [])
                     source_data = [
@@ -469,87 +551,52 @@ def _stream_pipeline_response(
                          "snippet": s.get("content", "")[:200], "score": s.get("score", 0)}
                         for s in all_sources
                     ]
-                    yield f"event: sources\ndata: {json.dumps({'sources': source_data})}\n\n"
+                    yield _sse("sources", {"sources": source_data})
                 elif event.type == "tool_start":
-                    yield f"event: tool_start\ndata: {json.dumps(event.data)}\n\n"
+                    yield _sse("tool_start", event.data)
                 elif event.type == "tool_result":
-                    yield f"event: tool_result\ndata: {json.dumps(event.data)}\n\n"
+                    yield _sse("tool_result", event.data)
                 elif event.type == "file_attachment":
                     all_file_attachments.append(event.data)
-                    yield f"event: file_attachment\ndata: {json.dumps(event.data)}\n\n"
+                    yield _sse("file_attachment", event.data)
                 elif event.type == "done":
                     all_tool_calls = event.data.get("tool_calls", [])
                     if not all_file_attachments:
                         all_file_attachments = event.data.get("file_attachments", [])
 
             # Pipeline 完成后立即保存消息（不依赖后续 yield 成功）
-            latency_ms = int((time.monotonic() - started) * 1000)
-            completion_tokens = _estimate_tokens(full_content)
-            prompt_tokens = _estimate_tokens(message)
-
-            assistant_msg = Message(
-                conversation_id=conv_id,
-                role="assistant",
-                content=full_content,
-                thinking_content=full_thinking or None,
-                sources=all_sources,
-                tool_calls=all_tool_calls,
-                attachments=all_file_attachments if all_file_attachments else [],
-                model_used=provider,
-                latency_ms=latency_ms,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                tokens_used=(prompt_tokens + completion_tokens) if (prompt_tokens or completion_tokens) else None,
-            )
-            db.add(assistant_msg)
+            row = _assistant_row()
+            message_id = (await db.execute(_INSERT_ASSISTANT_MESSAGE, row)).scalar_one()
             conv.updated_at = datetime.utcnow()
             await db.commit()
             saved = True
 
             payload = {
-                "message_id": str(assistant_msg.id),
-                "latency_ms": latency_ms,
-                "tokens_used": assistant_msg.tokens_used,
-                "prompt_tokens": assistant_msg.prompt_tokens,
-                "completion_tokens": assistant_msg.completion_tokens,
-                "cost_usd": assistant_msg.cost_usd,
+                "message_id": str(message_id),
+                "latency_ms": row["latency_ms"],
+                "tokens_used": row["tokens_used"],
+                "prompt_tokens": row["prompt_tokens"],
+                "completion_tokens": row["completion_tokens"],
+                "cost_usd": None,
                 "tool_calls": all_tool_calls,
             }
-            yield f"event: done\ndata: {json.dumps(payload)}\n\n"
+            yield _sse("done", payload)
 
             if conv.memory_enabled:
                 asyncio.create_task(_update_conversation_memory(conv_id))
         except Exception as e:
-            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            yield _sse("error", {"error": str(e)})
         finally:
             # 客户端断开时 yield 会抛异常，确保已收集的内容仍被保存
-            if not saved and full_content:
+            if not saved and any(content_parts):
                 try:
                     async with AsyncSessionLocal() as fallback_db:
-                        latency_ms = int((time.monotonic() - started) * 1000)
-                        completion_tokens = _estimate_tokens(full_content)
-                        prompt_tokens = _estimate_tokens(message)
-                        assistant_msg = Message(
-                            conversation_id=conv_id,
-                            role="assistant",
-                            content=full_content,
-                            thinking_content=full_thinking or None,
-                            sources=all_sources,
-                            tool_calls=all_tool_calls,
-                            attachments=all_file_attachments if all_file_attachments else [],
-                            model_used=provider,
-                            latency_ms=latency_ms,
-                            prompt_tokens=prompt_tokens,
-                            completion_tokens=completion_tokens,
-                            tokens_used=(prompt_tokens + completion_tokens) if (prompt_tokens or completion_tokens) else None,
-                        )
-                        fallback_db.add(assistant_msg)
-                        result = await fallback_db.execute(
-                            select(Conversation).where(Conversation.id == conv_id)
+                        await fallback_db.execute(_INSERT_ASSISTANT_MESSAGE, _assistant_row())
+                        await fallback_db.execute(
+                            update(Conversation)
+                            .where(Conversation.id == conv_id)
+                            .values(updated_at=datetime.utcnow())
                         )
-                        c = result.scalar_one_or_none()
-                        if c:
-                            c.updated_at = datetime.utcnow()
                         await fallback_db.commit()
                 except Exception:
                     pass  # 尽力保存，失败则放弃
@@ -40,6 +40,9 @@ def _sync_add_missing_columns(conn):
         for col in table.columns:
             if col.name not in db_columns:
                 col_type = col.type.compile(dialect=conn.dialect)
+                if col.computed is not None:
+                    # Without the expression this would be a plain, never-filled column
+                    col_type += f" GENERATED ALWAYS AS ({col.computed.sqltext}) STORED"
                 conn.execute(text(
                     f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {col_type}'
                 ))
@@ -63,3 +66,16 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+async def get_ro_conn():
+    """Pooled AUTOCOMMIT connection for read-only endpoints.
+
+    Skips the ORM session, its identity map and the BEGIN/ROLLBACK pair
+    that get_db costs on every GET.
+    """
+    if engine is None:
+        raise RuntimeError("Database not configured. Set DATABASE_URL in .env")
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        yield conn
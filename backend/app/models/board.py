@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Text
+from sqlalchemy import Computed, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID, JSONB, TIMESTAMP
 from app.database import Base
@@ -16,5 +16,9 @@ class Board(Base):
     nodes = mapped_column(JSONB, default=list)
     edges = mapped_column(JSONB, default=list)
     viewport = mapped_column(JSONB, default=lambda: {"x": 0, "y": 0, "zoom": 1})
+    # 生成列：写入时由 PostgreSQL 计算，列表查询不必解析 nodes
+    node_count: Mapped[int] = mapped_column(
+        Integer, Computed("COALESCE(jsonb_array_length(nodes), 0)", persisted=True)
+    )
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
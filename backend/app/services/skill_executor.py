@@ -2,6 +2,7 @@
 import os
 import yaml
 import importlib.util
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -19,11 +20,17 @@ def get_skills_dir() -> Path:
 
 
 def load_registry() -> list[dict]:
-    """从 registry.yaml 加载所有已注册的 skill"""
-    skills_dir = get_skills_dir()
-    registry_path = skills_dir / "registry.yaml"
-    if not registry_path.exists():
+    """从 registry.yaml 加载所有已注册的 skill（按文件 mtime 缓存，文件改动后自动重新解析）"""
+    registry_path = get_skills_dir() / "registry.yaml"
+    try:
+        mtime = registry_path.stat().st_mtime_ns
+    except OSError:
         return []
+    return _parse_registry(str(registry_path), mtime)
+
+
+@lru_cache(maxsize=4)
+def _parse_registry(registry_path: str, mtime: int) -> list[dict]:
     with open(registry_path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f) or {}
     return data.get("skills", [])
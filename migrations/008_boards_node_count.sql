@@ -0,0 +1,9 @@
+-- 008: 画布节点数生成列
+-- node_count 写入时算好，list_boards 不再逐行对 nodes 做 jsonb_array_length。
+-- ADD COLUMN ... STORED 会重写 boards 表，可在普通事务中执行。
+-- 顺序：先运行本文件，再单独运行 009_boards_list_index.sql（其索引 INCLUDE 了 node_count）。
+-- 后端启动时 init_db 也可能已补上 node_count，此时本文件不做任何事，但 009 的索引仍需执行。
+
+ALTER TABLE boards
+    ADD COLUMN IF NOT EXISTS node_count INTEGER
+    GENERATED ALWAYS AS (COALESCE(jsonb_array_length(nodes), 0)) STORED;
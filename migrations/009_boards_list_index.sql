@@ -0,0 +1,12 @@
+-- 009: 画布列表分页索引
+-- list_boards 按 (updated_at, id) 倒序做键集分页。
+-- INCLUDE 只放定长/有界列：description、thumbnail_url 是无界 TEXT，放进索引会超出 btree 行大小上限导致写入失败。
+-- 顺序：须在 008_boards_node_count.sql（或后端 init_db 补列）之后运行，node_count 列必须已存在。
+-- CONCURRENTLY 不能在事务中执行：请单独运行本文件，不要用 psql -1 或会包事务的迁移工具。
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_boards_updated_id
+    ON boards (updated_at DESC, id DESC)
+    INCLUDE (name, node_count, created_at);
+
+-- 被上面的分页索引取代
+DROP INDEX CONCURRENTLY IF EXISTS idx_boards_updated;